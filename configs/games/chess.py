@@ -84,4 +84,16 @@ game_description = dict(
 
 player_first = True
 user_is_white = True
+# UCI engine playing the opponent in e2e games.
+stockfish_path = '/usr/games/stockfish'
+# Search limit of the opponent: any of `nodes`, `depth` and `time` (seconds
+# per move), one second per move when none is set. A node limit gives the
+# same moves on every machine. With `reference_nps`, `time` is scaled to the
+# speed of this host relative to a host searching that many nodes per second.
+# `skill_level` (0-20) weakens the engine but makes its moves random.
+adversary = dict(nodes=None,
+                 depth=None,
+                 time=None,
+                 reference_nps=None,
+                 skill_level=None)
 qa = ChessQuestionAnswering
@@ -80,4 +80,9 @@ game_description = dict(
 
 chessboard_size = 15
 player_first = True
+# Plies searched by the opponent for each move, deepened one ply at a time.
+# With `search_time` (seconds), the deepest search finished within it is
+# used, which makes the moves depend on the host.
+search_depth = 3
+search_time = None
 qa = GomokuQuestionAnswering
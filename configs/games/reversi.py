@@ -81,4 +81,6 @@ game_description = dict(
 )
 
 player_first = True
+# Plies searched by the opponent for each move.
+search_depth = 3
 qa = ReversiQuestionAnswering
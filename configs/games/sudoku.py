@@ -69,4 +69,8 @@ game_description = dict(
 )
 
 player_first = True
+# Clues left in generated puzzles: 'easy', 'medium', 'hard', 'expert' or a
+# number. Digits are removed while the solution stays unique, so low targets
+# may not be reached. None removes digits until five removals fail.
+difficulty = None
 qa = SudokuQuestionAnswering
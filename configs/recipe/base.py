@@ -2,3 +2,19 @@ name = 'standard'
 save_path = 'experiments'
 tasks = ['perceive', 'qa', 'rule', 'e2e']
 games = ['tictactoe', 'reversi', 'gomoku', 'minesweeper', 'sudoku', 'chess']
+# Number of agent requests kept in flight for the offline tasks.
+concurrency = 1
+# Number of offline samples sent to the agent per get_decisions call.
+batch_size = 1
+# Number of e2e games played at the same time.
+e2e_parallel = 1
+# Number of offline batches whose images are prepared ahead (0 disables).
+prefetch = 2
+# Directory of resized and encoded benchmark images shared across runs.
+image_cache = 'experiments/image_cache'
+# Shared SQLite work queue, e.g. 'experiments/standard/queue.sqlite', to let
+# several workers drain this recipe together (None runs it in-process).
+work_queue = None
+lease_seconds = 600
+# Leases a queued round may use before it is marked failed for this run.
+max_attempts = 3
@@ -13,13 +13,37 @@ def parse_args():
                         type=str,
                         help='Path to the benchmark setting config.',
                         default='configs/base.py')
+    parser.add_argument('--num-workers',
+                        type=int,
+                        help='Number of worker processes used to render the '
+                        'benchmark. Overrides the benchmark setting.',
+                        default=None)
+    parser.add_argument('--sample-size',
+                        type=int,
+                        help='Number of samples per task/game pair. '
+                        'Overrides the benchmark setting; raising it on an '
+                        'existing benchmark only renders the new samples.',
+                        default=None)
+    parser.add_argument('--regenerate',
+                        nargs='+',
+                        metavar=('TASK GAME', 'INDEX'),
+                        help='Re-render selected samples of an existing '
+                        'task/game pair from their recorded seeds, e.g. '
+                        '"--regenerate qa chess 12 345".',
+                        default=None)
     return parser.parse_args()
 
 
 def main():
     args = parse_args()
-    generator = Generator(args.benchmark_setting)
-    generator.generate_benchmark()
+    generator = Generator(args.benchmark_setting,
+                          args.num_workers,
+                          sample_size=args.sample_size)
+    if args.regenerate:
+        task, game, *indices = args.regenerate
+        generator.regenerate(task, game, [int(i) for i in indices])
+    else:
+        generator.generate_benchmark()
 
 
 if __name__ == '__main__':
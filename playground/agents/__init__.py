@@ -1,4 +1,5 @@
 from .base import BaseAgent
+from .decision_cache import CachedAgent, DecisionCache
 from .single_step_agents import (AnthropicAgentSingleStep,
                                  GoogleAIAgentSingleStep,
                                  LMDeployAgentSingleStep,
@@ -10,4 +11,6 @@ __all__ = [
     'LMDeployAgentSingleStep',
     'GoogleAIAgentSingleStep',
     'AnthropicAgentSingleStep',
+    'CachedAgent',
+    'DecisionCache',
 ]
@@ -1,15 +1,67 @@
+import asyncio
 from abc import ABC, abstractmethod
+from typing import Union
+
+from PIL import Image
+
+from playground.agents.rate_limiter import RateLimiter
+from playground.utils import prepare_image
 
 
 class BaseAgent(ABC):
 
     def __init__(self, agent_cfg):
         self.agent_cfg = agent_cfg
+        self.rate_limiter = RateLimiter.from_config(
+            agent_cfg.lmm_agent.rate_limit)
 
     @abstractmethod
-    def get_decision(self, screenshot_path: str, prompt: str):
+    def get_decision(self, screenshot: Union[str, Image.Image], prompt: str):
         """
-        Given the path to a screenshot of the current game state and a prompt,
-        this method should return a decision on the next move or action.
+        Given a screenshot of the current game state, either the path to an
+        image file or an in-memory PIL image, and a prompt, this method should
+        return a decision on the next move or action.
         """
         raise NotImplementedError('The method not implemented')
+
+    def prepare_image(self, screenshot):
+        """
+        Do the image work of ``get_decision`` ahead of time, e.g. on a
+        prefetch thread. Returns a ``PreparedImage`` that ``get_decision``
+        accepts in place of the screenshot. The default decodes the image.
+        """
+        return prepare_image(screenshot, decode=True)
+
+    def reserve(self, prompt: str):
+        """
+        Wait until the configured rate limit allows one more request with
+        this prompt and an image. Returns the reservation to ``settle`` once
+        the usage is known, or None without a rate limit.
+        """
+        if self.rate_limiter is None:
+            return None
+        return self.rate_limiter.acquire(
+            self.rate_limiter.estimate_input_tokens(prompt),
+            self.agent_cfg.lmm_agent.max_tokens or 0)
+
+    def settle(self, reservation, input_tokens=None, output_tokens=None):
+        """Correct a reservation with the token usage reported by the API."""
+        if reservation is not None:
+            self.rate_limiter.settle(reservation, input_tokens, output_tokens)
+
+    async def get_decisions(self, batch):
+        """
+        Asynchronous batched version of ``get_decision``. ``batch`` is a list
+        of ``(screenshot, prompt)`` pairs. Returns the decisions in the same
+        order; a request that fails gives its exception in place of the
+        decision instead of failing the whole batch.
+
+        The default runs ``get_decision`` in the event loop's executor, one
+        thread per request, so blocking HTTP clients overlap. Agents with a
+        native async or batched backend should override it.
+        """
+        calls = [
+            asyncio.to_thread(self.get_decision, screenshot, prompt)
+            for screenshot, prompt in batch
+        ]
+        return await asyncio.gather(*calls, return_exceptions=True)
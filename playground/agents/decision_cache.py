@@ -0,0 +1,187 @@
+import dataclasses
+import hashlib
+import json
+import os
+import os.path as osp
+import sqlite3
+import threading
+import time
+
+from PIL import Image
+
+from playground.agents.base import BaseAgent
+from playground.utils import PreparedImage
+
+# lmm_agent settings that do not change what the model answers.
+NON_GENERATIVE_KEYS = ('name', 'cache', 'rate_limit', 'pool_size', 'timeout',
+                       'max_retries', 'backoff_factor', 'backoff_max')
+CACHE_MODES = ('read_through', 'write_only')
+
+
+def _config_value(value):
+    if dataclasses.is_dataclass(value):
+        return dataclasses.asdict(value)
+    if hasattr(value, '__dict__'):
+        return {
+            'type': type(value).__name__,
+            'fields':
+            {k: v
+             for k, v in vars(value).items() if not k.startswith('_')}
+        }
+    return repr(value)
+
+
+def decision_key(lmm_agent, screenshot, prompt):
+    """Content hash of a decision request: the model settings, the prompt
+    and the image pixels or file bytes."""
+    settings = {
+        k: v
+        for k, v in lmm_agent.to_dict().items() if k not in NON_GENERATIVE_KEYS
+    }
+    digest = hashlib.sha256()
+    digest.update(
+        json.dumps(settings, sort_keys=True,
+                   default=_config_value).encode('utf-8'))
+    digest.update(b'\0' + prompt.encode('utf-8') + b'\0')
+    if isinstance(screenshot, PreparedImage):
+        screenshot = screenshot.source
+    if isinstance(screenshot, Image.Image):
+        digest.update(f'{screenshot.mode}{screenshot.size}'.encode('utf-8'))
+        digest.update(screenshot.tobytes())
+    else:
+        with open(screenshot, 'rb') as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+
+class DecisionCache:
+    """Persistent key-value store of agent outputs in SQLite, evicting the
+    least recently used entries beyond ``max_entries`` or ``max_bytes``."""
+
+    def __init__(self, path, max_entries=None, max_bytes=None):
+        os.makedirs(osp.dirname(osp.abspath(path)), exist_ok=True)
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(path,
+                                  timeout=60,
+                                  check_same_thread=False,
+                                  isolation_level=None)
+        self.db.execute('PRAGMA journal_mode=WAL')
+        self.db.execute('CREATE TABLE IF NOT EXISTS decisions ('
+                        'key TEXT PRIMARY KEY, output TEXT NOT NULL, '
+                        'size INTEGER NOT NULL, last_used REAL NOT NULL)')
+        self.db.execute('CREATE INDEX IF NOT EXISTS decisions_last_used '
+                        'ON decisions (last_used)')
+
+    def get(self, key):
+        with self.lock:
+            row = self.db.execute('SELECT output FROM decisions WHERE key = ?',
+                                  (key, )).fetchone()
+            if row is None:
+                return None
+            self.db.execute('UPDATE decisions SET last_used = ? WHERE key = ?',
+                            (time.time(), key))
+            return row[0]
+
+    def put(self, key, output):
+        size = len(output.encode('utf-8'))
+        with self.lock:
+            self.db.execute('BEGIN IMMEDIATE')
+            try:
+                self.db.execute(
+                    'INSERT OR REPLACE INTO decisions VALUES (?, ?, ?, ?)',
+                    (key, output, size, time.time()))
+                self.evict()
+                self.db.execute('COMMIT')
+            except BaseException:
+                self.db.execute('ROLLBACK')
+                raise
+
+    def evict(self):
+        if self.max_entries:
+            self.db.execute(
+                'DELETE FROM decisions WHERE key IN (SELECT key FROM '
+                'decisions ORDER BY last_used DESC LIMIT -1 OFFSET ?)',
+                (self.max_entries, ))
+        if self.max_bytes:
+            total = self.db.execute(
+                'SELECT COALESCE(SUM(size), 0) FROM decisions').fetchone()[0]
+            if total <= self.max_bytes:
+                return
+            stale = []
+            for key, size in self.db.execute(
+                    'SELECT key, size FROM decisions ORDER BY last_used'):
+                if total <= self.max_bytes:
+                    break
+                stale.append((key, ))
+                total -= size
+            self.db.executemany('DELETE FROM decisions WHERE key = ?', stale)
+
+    def close(self):
+        self.db.close()
+
+
+class CachedAgent(BaseAgent):
+    """Agent wrapper that answers repeated requests from a
+    ``DecisionCache``.
+
+    In ``read_through`` mode a cached output is returned without calling the
+    agent, and misses are stored. In ``write_only`` mode the agent is always
+    called and the cache is refreshed with its outputs. Other attributes are
+    forwarded to the wrapped agent.
+    """
+
+    def __init__(self, agent, cache_cfg):
+        super().__init__(agent.agent_cfg)
+        self.agent = agent
+        self.mode = cache_cfg.mode or 'read_through'
+        if self.mode not in CACHE_MODES:
+            raise ValueError(f'Invalid decision cache mode: {self.mode}')
+        max_size_mb = cache_cfg.max_size_mb
+        max_bytes = int(max_size_mb * 2**20) if max_size_mb else None
+        self.cache = DecisionCache(cache_cfg.path,
+                                   max_entries=cache_cfg.max_entries,
+                                   max_bytes=max_bytes)
+
+    @classmethod
+    def wrap(cls, agent):
+        """Wrap an agent if its config sets ``lmm_agent.cache``."""
+        cache_cfg = agent.agent_cfg.lmm_agent.cache
+        return cls(agent, cache_cfg) if cache_cfg else agent
+
+    def __getattr__(self, name):
+        if name == 'agent':
+            raise AttributeError(name)
+        return getattr(self.agent, name)
+
+    def prepare_image(self, screenshot):
+        return self.agent.prepare_image(screenshot)
+
+    def key(self, screenshot, prompt):
+        return decision_key(self.agent_cfg.lmm_agent, screenshot, prompt)
+
+    def lookup(self, key):
+        return self.cache.get(key) if self.mode == 'read_through' else None
+
+    def get_decision(self, screenshot, prompt: str):
+        key = self.key(screenshot, prompt)
+        output = self.lookup(key)
+        if output is None:
+            output = self.agent.get_decision(screenshot, prompt)
+            if isinstance(output, str):
+                self.cache.put(key, output)
+        return output
+
+    async def get_decisions(self, batch):
+        keys = [self.key(screenshot, prompt) for screenshot, prompt in batch]
+        outputs = [self.lookup(key) for key in keys]
+        misses = [i for i, output in enumerate(outputs) if output is None]
+        if misses:
+            answers = await self.agent.get_decisions(
+                [batch[i] for i in misses])
+            for i, output in zip(misses, answers):
+                outputs[i] = output
+                if isinstance(output, str):
+                    self.cache.put(keys[i], output)
+        return outputs
@@ -0,0 +1,39 @@
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+RETRY_STATUS = (429, 500, 502, 503, 504)
+
+
+def create_session(lmm_agent):
+    """Create a pooled keep-alive session for an API agent.
+
+    Failed requests (connection errors, 429 and 5xx) are retried with
+    exponential backoff and jitter, waiting for ``Retry-After`` when the
+    server sends it. The pool and retry settings are read from the
+    ``lmm_agent`` config. ``backoff_max`` and ``backoff_jitter`` need
+    urllib3 2.
+    """
+    pool_size = lmm_agent.pool_size or 16
+    # 0 is a valid setting for both: no retries, or no wait between them.
+    max_retries = lmm_agent.max_retries
+    if max_retries is None:
+        max_retries = 5
+    backoff_factor = lmm_agent.backoff_factor
+    if backoff_factor is None:
+        backoff_factor = 1.0
+    retry = Retry(total=max_retries,
+                  status_forcelist=RETRY_STATUS,
+                  allowed_methods=None,
+                  backoff_factor=backoff_factor,
+                  backoff_max=lmm_agent.backoff_max or 60,
+                  backoff_jitter=1.0,
+                  respect_retry_after_header=True,
+                  raise_on_status=False)
+    adapter = HTTPAdapter(pool_connections=1,
+                          pool_maxsize=pool_size,
+                          max_retries=retry)
+    session = requests.Session()
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
@@ -0,0 +1,127 @@
+import fcntl
+import json
+import os
+import os.path as osp
+import threading
+import time
+from contextlib import contextmanager
+
+BUCKETS = ('requests', 'input_tokens', 'output_tokens')
+
+
+class RateLimiter:
+    """Token-bucket limiter for requests, input tokens and output tokens per
+    minute.
+
+    With a ``state_file`` the buckets live in that file and are updated under
+    an exclusive ``flock``, so every process pointing at the same file draws
+    from one shared quota. Without it the buckets are private to the process.
+    Token costs are reserved up front from an estimate and settled against
+    the usage reported by the API once the response arrives.
+    """
+
+    def __init__(self,
+                 requests_per_minute=None,
+                 input_tokens_per_minute=None,
+                 output_tokens_per_minute=None,
+                 image_tokens=1000,
+                 state_file=None):
+        limits = (requests_per_minute, input_tokens_per_minute,
+                  output_tokens_per_minute)
+        self.capacity = {
+            name: limit
+            for name, limit in zip(BUCKETS, limits) if limit
+        }
+        self.image_tokens = image_tokens
+        self.state_file = state_file
+        self.state = {}
+        self.lock = threading.Lock()
+        if state_file:
+            os.makedirs(osp.dirname(osp.abspath(state_file)), exist_ok=True)
+
+    @classmethod
+    def from_config(cls, rate_limit):
+        """Build a limiter from the ``lmm_agent.rate_limit`` config, or return
+        None when it is not set."""
+        if not rate_limit:
+            return None
+        return cls(
+            requests_per_minute=rate_limit.requests_per_minute,
+            input_tokens_per_minute=rate_limit.input_tokens_per_minute,
+            output_tokens_per_minute=rate_limit.output_tokens_per_minute,
+            image_tokens=rate_limit.image_tokens or 1000,
+            state_file=rate_limit.state_file)
+
+    def estimate_input_tokens(self, prompt, num_images=1):
+        """Rough input size: about four characters of text per token plus a
+        fixed cost per image."""
+        return len(prompt) // 4 + num_images * self.image_tokens
+
+    def acquire(self, input_tokens=0, output_tokens=0):
+        """Block until one request with the given token costs fits in every
+        bucket, then take it. Returns the reserved costs."""
+        cost = {
+            'requests': 1,
+            'input_tokens': input_tokens,
+            'output_tokens': output_tokens
+        }
+        while True:
+            with self.buckets() as levels:
+                waits = [
+                    (min(cost[name], capacity) - levels[name]) / capacity * 60
+                    for name, capacity in self.capacity.items()
+                ]
+                wait = max(waits, default=0)
+                if wait <= 0:
+                    for name in self.capacity:
+                        levels[name] -= cost[name]
+                    return cost
+            time.sleep(wait)
+
+    def settle(self, reserved, input_tokens=None, output_tokens=None):
+        """Replace the reserved token costs with the actual usage, refunding
+        over-estimates and charging under-estimates. Unknown usage keeps the
+        reservation."""
+        used = {'input_tokens': input_tokens, 'output_tokens': output_tokens}
+        with self.buckets() as levels:
+            for name, actual in used.items():
+                if actual is not None and name in self.capacity:
+                    levels[name] += reserved[name] - actual
+
+    @contextmanager
+    def buckets(self):
+        """Lock the limiter and yield the bucket levels, refilled up to now.
+        Changes to the levels are stored when the block exits."""
+        with self.lock:
+            if not self.state_file:
+                levels = self.refill(self.state)
+                yield levels
+                self.state = {
+                    name: (levels[name], self.now)
+                    for name in levels
+                }
+                return
+            with open(self.state_file, 'a+') as f:
+                fcntl.flock(f, fcntl.LOCK_EX)
+                f.seek(0)
+                content = f.read()
+                levels = self.refill(json.loads(content) if content else {})
+                try:
+                    yield levels
+                finally:
+                    f.seek(0)
+                    f.truncate()
+                    json.dump(
+                        {name: (levels[name], self.now)
+                         for name in levels}, f)
+                    f.flush()
+                    fcntl.flock(f, fcntl.LOCK_UN)
+
+    def refill(self, state):
+        self.now = time.time()
+        levels = {}
+        for name, capacity in self.capacity.items():
+            level, updated = state.get(name, (capacity, self.now))
+            refill = max(self.now - updated, 0) * capacity / 60
+            levels[name] = min(capacity, level + refill)
+        return levels
@@ -1,15 +1,15 @@
+import asyncio
+import base64
 import os
-import pathlib
 
 import anthropic
 import google.generativeai as genai
-import requests
 from lmdeploy import pipeline
-from lmdeploy.vl import load_image
 
 from playground.agents import BaseAgent
+from playground.agents.http_client import create_session
 from playground.registry import AGENT_REGISTRY
-from playground.utils import encode_image
+from playground.utils import image_payload, load_image, prepare_image
 
 
 @AGENT_REGISTRY.register('openai_single')
@@ -27,9 +27,20 @@ class OpenAIAgentSingleStep(BaseAgent):
             'max_tokens': agent_cfg.lmm_agent.max_tokens
         }
         self.input_sz = agent_cfg.lmm_agent.image_size
-
-    def get_decision(self, screenshot_path: str, prompt: str):
-        base64_image = encode_image(screenshot_path, self.input_sz)
+        self.image_format = agent_cfg.lmm_agent.image_format or 'PNG'
+        base_url = agent_cfg.lmm_agent.base_url or 'https://api.openai.com/v1'
+        self.url = base_url.rstrip('/') + '/chat/completions'
+        self.timeout = tuple(agent_cfg.lmm_agent.timeout or (10, 120))
+        self.session = create_session(agent_cfg.lmm_agent)
+
+    def prepare_image(self, screenshot):
+        return prepare_image(screenshot,
+                             payloads=[(self.input_sz, self.image_format)])
+
+    def get_decision(self, screenshot, prompt: str):
+        data, mime_type = image_payload(screenshot, self.input_sz,
+                                        self.image_format)
+        base64_image = base64.b64encode(data).decode('utf-8')
         payload = self.base_payload.copy()
         payload['messages'] = [{
             'role':
@@ -40,14 +51,20 @@ class OpenAIAgentSingleStep(BaseAgent):
             }, {
                 'type': 'image_url',
                 'image_url': {
-                    'url': f'data:image/jpeg;base64,{base64_image}'
+                    'url': f'data:{mime_type};base64,{base64_image}'
                 }
             }]
         }]
-        outputs = requests.post('https://api.openai.com/v1/chat/completions',
-                                headers=self.headers,
-                                json=payload)
-        outputs = outputs.json()
+        reservation = self.reserve(prompt)
+        response = self.session.post(self.url,
+                                     headers=self.headers,
+                                     json=payload,
+                                     timeout=self.timeout)
+        response.raise_for_status()
+        outputs = response.json()
+        usage = outputs.get('usage', {})
+        self.settle(reservation, usage.get('prompt_tokens'),
+                    usage.get('completion_tokens'))
         return outputs['choices'][0]['message']['content']
 
 
@@ -60,13 +77,20 @@ class GoogleAIAgentSingleStep(BaseAgent):
         genai.configure(api_key=self.api_key)
         self.model = genai.GenerativeModel(
             model_name=agent_cfg.lmm_agent.model)
+        self.image_format = agent_cfg.lmm_agent.image_format or 'PNG'
 
-    def get_decision(self, screenshot_path: str, prompt: str):
-        image = {
-            'mime_type': 'image/png',
-            'data': pathlib.Path(screenshot_path).read_bytes()
-        }
+    def prepare_image(self, screenshot):
+        return prepare_image(screenshot, payloads=[(None, self.image_format)])
+
+    def get_decision(self, screenshot, prompt: str):
+        data, mime_type = image_payload(screenshot,
+                                        image_format=self.image_format)
+        image = {'mime_type': mime_type, 'data': data}
+        reservation = self.reserve(prompt)
         outputs = self.model.generate_content([prompt, image])
+        usage = outputs.usage_metadata
+        self.settle(reservation, usage.prompt_token_count,
+                    usage.candidates_token_count)
         return outputs.text
 
 
@@ -80,10 +104,17 @@ class AnthropicAgentSingleStep(BaseAgent):
             'max_tokens': agent_cfg.lmm_agent.max_tokens
         }
         self.input_sz = agent_cfg.lmm_agent.image_size
+        self.image_format = agent_cfg.lmm_agent.image_format or 'PNG'
         self.model = anthropic.Anthropic()
 
-    def get_decision(self, screenshot_path: str, prompt: str):
-        base64_image = encode_image(screenshot_path, self.input_sz)
+    def prepare_image(self, screenshot):
+        return prepare_image(screenshot,
+                             payloads=[(self.input_sz, self.image_format)])
+
+    def get_decision(self, screenshot, prompt: str):
+        data, mime_type = image_payload(screenshot, self.input_sz,
+                                        self.image_format)
+        base64_image = base64.b64encode(data).decode('utf-8')
         payload = self.base_payload.copy()
         payload['messages'] = [{
             'role':
@@ -92,7 +123,7 @@ class AnthropicAgentSingleStep(BaseAgent):
                 'type': 'image',
                 'source': {
                     'type': 'base64',
-                    'media_type': 'image/png',
+                    'media_type': mime_type,
                     'data': base64_image
                 }
             }, {
@@ -100,7 +131,10 @@ class AnthropicAgentSingleStep(BaseAgent):
                 'text': prompt
             }]
         }]
+        reservation = self.reserve(prompt)
         outputs = self.model.messages.create(**payload)
+        self.settle(reservation, outputs.usage.input_tokens,
+                    outputs.usage.output_tokens)
         return outputs.content[0].text
 
 
@@ -118,9 +152,26 @@ class LMDeployAgentSingleStep(BaseAgent):
             backend_config=agent_cfg.lmm_agent.backend_config)
         self.gen_config = agent_cfg.lmm_agent.general_config
 
-    def get_decision(self, screenshot_path: str, prompt: str):
-        image = load_image(screenshot_path)
+    def get_decision(self, screenshot, prompt: str):
+        image = load_image(screenshot)
         if self.is_deepseek_vl:
             prompt = '<IMAGE_TOKEN>' + prompt
         outputs = self.model((prompt, image), gen_config=self.gen_config)
         return outputs.text
+
+    def get_batch_decisions(self, batch):
+        """Send a list of ``(screenshot, prompt)`` pairs to the pipeline in
+        one call, so the engine can schedule the requests together."""
+        inputs = []
+        for screenshot, prompt in batch:
+            if self.is_deepseek_vl:
+                prompt = '<IMAGE_TOKEN>' + prompt
+            inputs.append((prompt, load_image(screenshot)))
+        outputs = self.model(inputs, gen_config=self.gen_config)
+        return [output.text for output in outputs]
+
+    async def get_decisions(self, batch):
+        try:
+            return await asyncio.to_thread(self.get_batch_decisions, batch)
+        except Exception as e:
+            return [e] * len(batch)
@@ -1,75 +1,297 @@
 import json
+import math
+import multiprocessing as mp
 import os
 import os.path as osp
 import sys
+from concurrent.futures import ProcessPoolExecutor
 
 from pjtools.configurator import AutoConfigurator
 from PyQt5.QtWidgets import QApplication
 
 from playground.registry import GAME_REGISTRY
-from playground.utils import set_random_seed
+from playground.utils import derive_seed, set_random_seed
+
+_QT_APP = None
+
+
+def ensure_qt_app(game_cfg):
+    """Create the offscreen QApplication the Qt renderers need, once per
+    process. The raster renderer runs without one."""
+    global _QT_APP
+    if (game_cfg.renderer or 'qt') != 'qt':
+        return None
+    if _QT_APP is None:
+        os.environ['QT_QPA_PLATFORM'] = 'offscreen'
+        _QT_APP = QApplication.instance() or QApplication(sys.argv)
+    return _QT_APP
+
+
+def render_shard(base_cfg, task, game, save_path, indices, seed):
+    """Render the given samples of a task/game pair in a worker process,
+    checkpointing each one to the worker's own manifest shard."""
+    generator = Generator(base_cfg, seed=seed)
+    game_cfg = AutoConfigurator.fromfile(f'configs/games/{game}.py')
+    ensure_qt_app(game_cfg)
+    manifest_path = osp.join(save_path, f'manifest_{indices[0]:07d}.jsonl')
+    with open(manifest_path, 'a', encoding='utf-8') as manifest:
+        generator.render_samples(task,
+                                 game_cfg,
+                                 save_path,
+                                 indices,
+                                 manifest=manifest)
+    return len(indices)
 
 
 class Generator:
 
-    def __init__(self, base_cfg):
+    def __init__(self,
+                 base_cfg,
+                 num_workers=None,
+                 seed=None,
+                 sample_size=None):
         cfg = AutoConfigurator.fromfile(base_cfg)
+        self.base_cfg = base_cfg
         self.benchmark_setting = cfg.benchmark_setting
-        self.seed = set_random_seed()
-        self.sample_size = self.benchmark_setting.sample_size
+        self.seed = set_random_seed(
+            seed if seed is not None else self.benchmark_setting.seed)
+        self.sample_size = sample_size or self.benchmark_setting.sample_size
+        self.num_workers = (num_workers or self.benchmark_setting.num_workers
+                            or 1)
 
     def generate_benchmark(self):
+        pending = []
         for task in self.benchmark_setting.offline_task:
             for game in self.benchmark_setting.games:
                 save_path = osp.join(self.benchmark_setting.benchmark_path,
                                      task, game)
                 if not osp.exists(save_path):
                     os.makedirs(save_path)
-                if osp.exists(osp.join(save_path, 'annotation.json')):
+                if self.is_complete(save_path):
                     print(
                         f'Benchmark data for {task} in {game} has been found.')
-                else:
-                    self.render(task, game, save_path)
+                    continue
+
+                done = self.load_manifest(task, game, save_path)
+                missing = [i for i in range(self.sample_size) if i not in done]
+                if not missing:
+                    self.finalize(task, game, save_path)
+                    continue
+                if done:
+                    print(f'Resuming {task} in {game}: {len(done)} samples '
+                          f'found, {len(missing)} to render.')
+                pending.append((task, game, save_path, missing))
+
+        if self.num_workers > 1:
+            self.render_parallel(pending)
+        else:
+            for task, game, save_path, missing in pending:
+                self.render(task, game, save_path, missing)
+
+    def is_complete(self, save_path):
+        """Whether the annotation file already covers the sample size."""
+        annotation_path = osp.join(save_path, 'annotation.json')
+        if not osp.exists(annotation_path):
+            return False
+        with open(annotation_path, 'r', encoding='utf-8') as json_file:
+            annotation = json.load(json_file)
+        return len(annotation['annotations']) >= self.sample_size
 
-    def render(self, task, game, save_path):
+    def render(self, task, game, save_path, indices=None):
+        if indices is None:
+            indices = range(self.sample_size)
         game_cfg = AutoConfigurator.fromfile(f'configs/games/{game}.py')
-        app = QApplication(sys.argv)  # noqa
+        ensure_qt_app(game_cfg)
+        with open(osp.join(save_path, 'manifest.jsonl'), 'a',
+                  encoding='utf-8') as manifest:
+            self.render_samples(task,
+                                game_cfg,
+                                save_path,
+                                indices,
+                                manifest=manifest)
+        self.finalize(task, game_cfg.game_name, save_path)
+
+    def render_samples(self,
+                       task,
+                       game_cfg,
+                       save_path,
+                       indices,
+                       seeds=None,
+                       manifest=None):
+        """Render the given sample indices. Each sample is seeded on its own,
+        either from ``seeds`` or from :meth:`sample_seed`, and appended to
+        ``manifest`` as soon as its screenshot is saved."""
+        if seeds is None:
+            seeds = [
+                self.sample_seed(task, game_cfg.game_name, i) for i in indices
+            ]
+        samples = list(zip(indices, seeds))
         if task == 'perceive':
-            self.render_perceive(game_cfg, save_path)
+            return self.render_perceive(game_cfg, save_path, samples, manifest)
         elif task == 'rule':
-            self.render_rule(game_cfg, save_path)
+            return self.render_rule(game_cfg, save_path, samples, manifest)
         elif task == 'qa':
-            self.render_qa(game_cfg, save_path)
+            return self.render_qa(game_cfg, save_path, samples, manifest)
         else:
             raise ValueError(f'Invalid task: {task}')
 
-    def render_perceive(self, game_cfg, save_path):
+    def sample_seed(self, task, game, index):
+        """Seed of a single sample, derived from the benchmark seed and the
+        (task, game, index) key."""
+        return derive_seed(self.seed, task, game, index)
+
+    def regenerate(self, task, game, indices):
+        """Re-render selected samples of an existing task/game pair from their
+        recorded seeds and update the annotation file in place."""
+        save_path = osp.join(self.benchmark_setting.benchmark_path, task, game)
+        with open(osp.join(save_path, 'annotation.json'),
+                  'r',
+                  encoding='utf-8') as json_file:
+            annotation = json.load(json_file)
+        annotations = annotation['annotations']
+        seeds = [
+            annotations[i].get('seed', self.sample_seed(task, game, i))
+            for i in indices
+        ]
+
+        game_cfg = AutoConfigurator.fromfile(f'configs/games/{game}.py')
+        ensure_qt_app(game_cfg)
+        self.load_manifest(task, game, save_path)
+        with open(osp.join(save_path, 'manifest.jsonl'), 'a',
+                  encoding='utf-8') as manifest:
+            rendered = self.render_samples(task, game_cfg, save_path, indices,
+                                           seeds, manifest)
+        for i, entry in zip(indices, rendered):
+            annotations[i] = entry
+        self.save_annotation(task, game, save_path, annotations)
+        return rendered
+
+    def checkpoint(self, manifest, index, annotation):
+        """Append one rendered sample to the manifest and flush it, so that
+        an interrupted run can resume from the next missing index."""
+        if manifest is None:
+            return
+        manifest.write(json.dumps({'index': index, **annotation}) + '\n')
+        manifest.flush()
+
+    def manifest_paths(self, save_path):
+        return sorted(
+            osp.join(save_path, name) for name in os.listdir(save_path)
+            if name.startswith('manifest') and name.endswith('.jsonl'))
+
+    def load_manifest(self, task, game, save_path):
+        """Collect the checkpointed samples of a task/game pair, keyed by
+        index. A benchmark that only has an ``annotation.json`` (e.g. a
+        downloaded or older one) is turned into a manifest first."""
+        manifest_paths = self.manifest_paths(save_path)
+        annotation_path = osp.join(save_path, 'annotation.json')
+        if not manifest_paths and osp.exists(annotation_path):
+            with open(annotation_path, 'r', encoding='utf-8') as json_file:
+                annotation = json.load(json_file)
+            assert annotation['task'] == task and annotation['game'] == game
+            manifest_path = osp.join(save_path, 'manifest.jsonl')
+            with open(manifest_path, 'w', encoding='utf-8') as manifest:
+                for i, entry in enumerate(annotation['annotations']):
+                    self.checkpoint(manifest, i, entry)
+            manifest_paths = [manifest_path]
+
+        done = {}
+        for manifest_path in manifest_paths:
+            with open(manifest_path, 'r', encoding='utf-8') as manifest:
+                for line in manifest:
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        # Torn last line of an interrupted run.
+                        continue
+                    if osp.exists(osp.join(save_path, entry['file'])):
+                        done[entry.pop('index')] = entry
+        return done
+
+    def finalize(self, task, game, save_path):
+        """Write ``annotation.json`` from the manifest once every sample is
+        present, and compact the manifest shards into one file."""
+        done = self.load_manifest(task, game, save_path)
+        annotations = [done[i] for i in range(self.sample_size)]
+        self.save_annotation(task, game, save_path, annotations)
+
+        manifest_paths = self.manifest_paths(save_path)
+        tmp_path = osp.join(save_path, 'manifest.jsonl.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as manifest:
+            for i in sorted(done):
+                self.checkpoint(manifest, i, done[i])
+        os.replace(tmp_path, osp.join(save_path, 'manifest.jsonl'))
+        for manifest_path in manifest_paths:
+            if osp.basename(manifest_path) != 'manifest.jsonl':
+                os.remove(manifest_path)
+
+    def split_shards(self, indices):
+        """Split the missing indices into contiguous chunks, a few per worker
+        so that slow shards do not stall the pool."""
+        shard_size = max(1, math.ceil(len(indices) / (self.num_workers * 4)))
+        return [
+            indices[start:start + shard_size]
+            for start in range(0, len(indices), shard_size)
+        ]
+
+    def render_parallel(self, pending):
+        """Render all pending task/game pairs with a pool of worker processes,
+        each owning its own offscreen QApplication when Qt renders."""
+        if not pending:
+            return
+        ctx = mp.get_context('spawn')
+        with ProcessPoolExecutor(max_workers=self.num_workers,
+                                 mp_context=ctx) as executor:
+            futures = []
+            for task, game, save_path, missing in pending:
+                shard_futures = [
+                    executor.submit(render_shard, self.base_cfg, task, game,
+                                    save_path, shard, self.seed)
+                    for shard in self.split_shards(missing)
+                ]
+                futures.append((task, game, save_path, shard_futures))
+
+            for task, game, save_path, shard_futures in futures:
+                for future in shard_futures:
+                    future.result()
+                self.finalize(task, game, save_path)
+                print(f'Benchmark data for {task} in {game} has been '
+                      f'merged from {len(shard_futures)} shards.')
+
+    def save_annotation(self, task, game, save_path, annotations):
+        with open(osp.join(save_path, 'annotation.json'),
+                  'w',
+                  encoding='utf-8') as json_file:
+            json.dump(
+                {
+                    'task': task,
+                    'game': game,
+                    'annotations': annotations,
+                }, json_file)
+
+    def render_perceive(self, game_cfg, save_path, samples, manifest=None):
         game_class = GAME_REGISTRY.get(game_cfg.game_name)
         annotations = []
-        for i in range(self.sample_size):
+        for i, seed in samples:
+            set_random_seed(seed)
             game = game_class(game_cfg)
             gt = game.get_random_state()
             screenshot = game.get_screenshot()
             screenshot.save(osp.join(save_path, f'{i:07d}.jpg'))
             annotation = {
                 'file': f'{i:07d}.jpg',
+                'seed': seed,
                 'gt': gt,
             }
+            self.checkpoint(manifest, i, annotation)
             annotations.append(annotation)
-        with open(osp.join(save_path, 'annotation.json'),
-                  'w',
-                  encoding='utf-8') as json_file:
-            json.dump(
-                {
-                    'task': 'perceive',
-                    'game': game_cfg.game_name,
-                    'annotations': annotations,
-                }, json_file)
+        return annotations
 
-    def render_qa(self, game_cfg, save_path):
+    def render_qa(self, game_cfg, save_path, samples, manifest=None):
         game_class = GAME_REGISTRY.get(game_cfg.game_name)
         annotations = []
-        for i in range(self.sample_size):
+        for i, seed in samples:
+            set_random_seed(seed)
             game = game_class(game_cfg)
             random_state = game.get_random_state()
             QA = game_cfg.qa(game_cfg.game_description['qa'])
@@ -81,45 +303,34 @@ class Generator:
             screenshot.save(osp.join(save_path, f'{i:07d}.jpg'))
             annotation = {
                 'file': f'{i:07d}.jpg',
+                'seed': seed,
                 'gt': {
                     'question': question,
                     'answer': answer,
                     'example_qa': example_qa
                 },
             }
+            self.checkpoint(manifest, i, annotation)
             annotations.append(annotation)
-        with open(osp.join(save_path, 'annotation.json'),
-                  'w',
-                  encoding='utf-8') as json_file:
-            json.dump(
-                {
-                    'task': 'qa',
-                    'game': game_cfg.game_name,
-                    'annotations': annotations,
-                }, json_file)
+        return annotations
 
-    def render_rule(self, game_cfg, save_path):
+    def render_rule(self, game_cfg, save_path, samples, manifest=None):
         game_class = GAME_REGISTRY.get(game_cfg.game_name)
         annotations = []
-        for i in range(self.sample_size):
+        for i, seed in samples:
+            set_random_seed(seed)
             game = game_class(game_cfg)
             rule_state, valid_movements = game.get_rule_state()
             screenshot = game.get_screenshot()
             screenshot.save(osp.join(save_path, f'{i:07d}.jpg'))
             annotation = {
                 'file': f'{i:07d}.jpg',
+                'seed': seed,
                 'gt': {
                     'rule_state': rule_state,
                     'valid_movements': valid_movements
                 },
             }
+            self.checkpoint(manifest, i, annotation)
             annotations.append(annotation)
-        with open(osp.join(save_path, 'annotation.json'),
-                  'w',
-                  encoding='utf-8') as json_file:
-            json.dump(
-                {
-                    'task': 'rule',
-                    'game': game_cfg.game_name,
-                    'annotations': annotations,
-                }, json_file)
+        return annotations
@@ -1,4 +1,3 @@
-
 class BaseQuestionAnswering:
 
     def __init__(self, general_prompt, shot=3):
@@ -10,12 +9,12 @@ class BaseQuestionAnswering:
         raise NotImplementedError('Subclasses should implement this method.')
 
     def get_qa_pairs(self, game_state):
-        qa_pairs = set()
+        qa_pairs = {}
         while len(qa_pairs) < self.shot + 1:
             question, answer = self.get_qa_pair(game_state)
             qa_pair = (question, answer)
             if qa_pair not in qa_pairs:
-                qa_pairs.add(qa_pair)
+                qa_pairs[qa_pair] = None
 
         return list(qa_pairs)
 
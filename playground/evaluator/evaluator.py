@@ -1,24 +1,67 @@
+import multiprocessing
 import os.path as osp
+import threading
 import time
+from concurrent.futures import (ProcessPoolExecutor, ThreadPoolExecutor,
+                                as_completed)
 
 import torch
+from pjtools.configurator import AutoConfigurator
 
+from playground.registry import AGENT_REGISTRY
 from playground.simulator import GameSimulator
-from playground.utils import set_random_seed
+from playground.utils import derive_seed, set_random_seed
+
+# Seeding the global RNGs and building a game must not interleave between
+# games played in parallel threads.
+GAME_SETUP_LOCK = threading.Lock()
+# QApplication and evaluator of an e2e worker process, see
+# ``Evaluator.run_e2e_games``.
+_worker_app = None
+_worker_evaluator = None
+
+
+def _init_e2e_worker(game_cfg_path, agent_cfg_path, task, log_file, save_path):
+    """Set up an e2e worker process: a QApplication for the Qt renderers
+    and an evaluator with its own agent."""
+    global _worker_evaluator, _worker_app
+    from PyQt5.QtWidgets import QApplication
+
+    _worker_app = QApplication.instance() or QApplication([])
+    agent_cfg = AutoConfigurator.fromfile(agent_cfg_path)
+    agent = AGENT_REGISTRY.get(agent_cfg.lmm_agent.agent)(agent_cfg)
+    _worker_evaluator = Evaluator(AutoConfigurator.fromfile(game_cfg_path),
+                                  agent, task, log_file, save_path)
+
+
+def _run_e2e_worker_round(index):
+    return _worker_evaluator.run_e2e_round(index)
 
 
 class Evaluator:
     """Evaluator class to run the game with the given agent."""
 
-    def __init__(self, game_cfg, agent, task, log_file, save_path):
+    def __init__(self,
+                 game_cfg,
+                 agent,
+                 task,
+                 log_file,
+                 save_path,
+                 game_cfg_path=None,
+                 agent_cfg_path=None):
         self.game_cfg = game_cfg
         self.agent = agent
         self.task = task
+        self.save_root = save_path
         self.save_path = osp.join(save_path, self.game_cfg.game_name,
                                   self.task,
                                   self.agent.agent_cfg.lmm_agent.name)
-        self.seed = set_random_seed()
+        self.seed = set_random_seed(game_cfg.benchmark_setting.seed)
         self.log_file = log_file
+        # Config files, needed to rebuild the game and the agent in e2e
+        # worker processes.
+        self.game_cfg_path = game_cfg_path
+        self.agent_cfg_path = agent_cfg_path
 
     def run(self, batch):
         if self.task == 'e2e':
@@ -32,18 +75,87 @@ class Evaluator:
         else:
             raise ValueError(f'Invalid task type: {self.task}')
 
+    def round_seed(self, index):
+        """Seed of a single e2e round, derived from the benchmark seed and the
+        (task, game, round) key."""
+        return derive_seed(self.seed, self.task, self.game_cfg.game_name,
+                           index)
+
     def run_e2e_game(self, batch):
-        crt_save_path = osp.join(self.save_path, f'round_{int(time.time())}')
-        simulator = GameSimulator(self.game_cfg, self.agent, self.seed,
-                                  crt_save_path, self.task)
+        index = batch.get('index')
+        round_name = f'round_{int(time.time())}'
+        if index is not None:
+            round_name = f'round_{index}_{int(time.time())}'
+        crt_save_path = osp.join(self.save_path, round_name)
+        seed = self.seed
+        with GAME_SETUP_LOCK:
+            if index is not None:
+                seed = set_random_seed(self.round_seed(index))
+            simulator = GameSimulator(self.game_cfg, self.agent, seed,
+                                      crt_save_path, self.task)
+            simulator.new_game()
 
         result = simulator.run_e2e(batch)
+        result['seed'] = seed
 
         # if self.game_cfg.make_video:
         #     simulator.make_video()
 
         return result, simulator
 
+    def run_e2e_round(self, index):
+        """Play the e2e round ``index`` and return its result."""
+        batch = {'task': self.task, 'game_cfg': self.game_cfg, 'index': index}
+        result, simulator = self.run_e2e_game(batch)
+        simulator.cleanup()
+        return result
+
+    def run_e2e_games(self, indices, num_workers=1):
+        """Play the e2e rounds ``indices`` with up to ``num_workers`` games at
+        a time, each with its own simulator, directory and log. Yields
+        ``(index, result)`` as the games finish, where ``result`` is the
+        exception raised by a failed game.
+
+        Games are played in threads, sharing the agent, with the raster
+        renderer. Qt widgets only live in the main thread, so with the Qt
+        renderer each game runs in a worker process with its own
+        QApplication and agent.
+        """
+        if num_workers <= 1 or len(indices) <= 1:
+            for index in indices:
+                try:
+                    yield index, self.run_e2e_round(index)
+                except Exception as e:
+                    yield index, e
+            return
+
+        num_workers = min(num_workers, len(indices))
+        if (self.game_cfg.renderer or 'qt') == 'raster':
+            executor = ThreadPoolExecutor(max_workers=num_workers)
+            run_round = self.run_e2e_round
+        else:
+            if not (self.game_cfg_path and self.agent_cfg_path):
+                raise ValueError('Parallel e2e games with the Qt renderer '
+                                 'need game_cfg_path and agent_cfg_path.')
+            executor = ProcessPoolExecutor(
+                max_workers=num_workers,
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=_init_e2e_worker,
+                initargs=(self.game_cfg_path, self.agent_cfg_path, self.task,
+                          self.log_file, self.save_root))
+            run_round = _run_e2e_worker_round
+
+        with executor:
+            futures = {
+                executor.submit(run_round, index): index
+                for index in indices
+            }
+            for future in as_completed(futures):
+                try:
+                    yield futures[future], future.result()
+                except Exception as e:
+                    yield futures[future], e
+
     def run_perceive(self, batch):
         crt_save_path = osp.join(self.save_path)
         simulator = GameSimulator(self.game_cfg,
@@ -80,5 +192,33 @@ class Evaluator:
 
         return result, simulator
 
+    async def run_offline(self, batches):
+        """Answer a list of offline (perceive, rule or qa) samples with one
+        ``get_decisions`` call. Returns the round results in order, with None
+        for the samples whose request failed."""
+        simulator = GameSimulator(self.game_cfg,
+                                  self.agent,
+                                  self.seed,
+                                  self.save_path,
+                                  self.task,
+                                  log_file=self.log_file)
+        simulator.new_game()
+        prompts = [simulator.get_prompt(batch) for batch in batches]
+        outputs = await self.agent.get_decisions([
+            (batch.get('screenshot', batch['screenshot_path']), prompt)
+            for batch, prompt in zip(batches, prompts)
+        ])
+
+        results = []
+        for batch, prompt, lmm_output in zip(batches, prompts, outputs):
+            if isinstance(lmm_output, Exception):
+                simulator.log(f'Failed to get decision from LMM: {lmm_output}')
+                results.append(None)
+            else:
+                results.append(
+                    simulator.offline_result(batch, prompt, lmm_output))
+        simulator.cleanup()
+        return results
+
     def cleanup(self):
         torch.cuda.empty_cache()
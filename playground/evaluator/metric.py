@@ -4,6 +4,8 @@ import re
 
 import numpy as np
 
+from playground.utils import load_record
+
 
 class Metric:
     MATRIX_CONFIG = {
@@ -99,8 +101,7 @@ class Metric:
     def __init__(self, record_path, annotation_dir):
         self.record_path = record_path
         self.annotation_dir = annotation_dir
-        with open(self.record_path, 'r') as f:
-            self.record = json.load(f)
+        self.record = load_record(self.record_path)
         self.debug_results = {}
         self.scores = {}
         self.weighted_summary = {}
@@ -1,3 +1,4 @@
 from .recipe import Recipe
+from .work_queue import SQLiteWorkQueue
 
-__all__ = ['Recipe']
+__all__ = ['Recipe', 'SQLiteWorkQueue']
@@ -0,0 +1,42 @@
+import asyncio
+import itertools
+from concurrent.futures import ThreadPoolExecutor
+
+
+class ImagePrefetcher:
+    """Prepare the screenshots of upcoming offline batches on a thread pool,
+    so the image work of a batch overlaps with the requests in flight.
+
+    ``prepare`` is the agent's ``prepare_image``. At most ``depth`` batches
+    beyond the ones being answered are prepared ahead.
+    """
+
+    def __init__(self, prepare, depth=2, num_workers=2):
+        self.prepare = prepare
+        self.depth = depth
+        self.executor = ThreadPoolExecutor(max_workers=num_workers)
+        self.jobs = {}
+
+    def submit(self, batches):
+        if id(batches) in self.jobs:
+            return
+        loop = asyncio.get_running_loop()
+        images = [
+            loop.run_in_executor(self.executor, self.prepare,
+                                 batch['screenshot_path']) for batch in batches
+        ]
+        self.jobs[id(batches)] = asyncio.gather(*images)
+
+    async def load(self, batches, upcoming):
+        """Attach the prepared ``screenshot`` to each batch, and start
+        preparing the first ``depth`` batches of ``upcoming``."""
+        self.submit(batches)
+        for ahead in itertools.islice(upcoming, self.depth):
+            self.submit(ahead)
+        images = await self.jobs.pop(id(batches))
+        for batch, image in zip(batches, images):
+            batch['screenshot'] = image
+        return batches
+
+    def shutdown(self):
+        self.executor.shutdown()
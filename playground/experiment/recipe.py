@@ -1,14 +1,26 @@
+import asyncio
 import gc
 import json
 import os
 import os.path as osp
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 
 import torch
 from pjtools.configurator import AutoConfigurator
 
+from playground.agents import CachedAgent
 from playground.evaluator import Evaluator
+from playground.experiment.prefetch import ImagePrefetcher
+from playground.experiment.work_queue import SQLiteWorkQueue
 from playground.registry import AGENT_REGISTRY
 from playground.state_code import GameStatusEncoder
+from playground.utils import (RecordJournal, configure_image_cache,
+                              load_record, set_result)
+
+# Seconds between checks of a work queue whose rounds are all leased.
+QUEUE_POLL_SECONDS = 2
 
 
 class Recipe:
@@ -23,9 +35,12 @@ class Recipe:
         self.save_path = osp.join(self.recipe.save_path, self.recipe.name)
         os.makedirs(self.save_path, exist_ok=True)
         self.log_file = osp.join(self.save_path, 'evaluation.log')
+        configure_image_cache(self.recipe.image_cache)
 
         self.agent = AGENT_REGISTRY.get(self.agent_cfg.lmm_agent.agent)(
             self.agent_cfg)
+        # Offline samples are deterministic, so their decisions can be cached.
+        self.offline_agent = CachedAgent.wrap(self.agent)
 
         self.init_experiment_record()
 
@@ -33,11 +48,8 @@ class Recipe:
         self.record_path = osp.join(
             self.save_path,
             self.agent_cfg.lmm_agent.name + self.recipe.name + '.json')
-        if osp.exists(self.record_path):
-            with open(self.record_path, 'r') as f:
-                self.record = json.load(f)
-        else:
-            self.record = {}
+        self.record = load_record(self.record_path)
+        self.journal = RecordJournal(self.record_path, GameStatusEncoder)
 
         self.update_record_with_new_tasks_and_games()
         self.save_record()
@@ -57,10 +69,46 @@ class Recipe:
                     self.record[task][game] = [None] * repetition_round
 
     def save_record(self):
-        with open(self.record_path, 'w') as f:
-            json.dump(self.record, f, indent=4, cls=GameStatusEncoder)
+        """Write the consolidated record and compact the journal."""
+        self.journal.compact(self.record)
+
+    def record_result(self, task, game, index, result):
+        """Store the result of one round, appending it to the journal."""
+        self.record[task][game][index] = result
+        self.journal.append(task, game, index, result)
+
+    def setup_task(self, task, game):
+        """Load the game config and the annotation of a (task, game) pair and
+        create its evaluator."""
+        annotation = None
+        if task != 'e2e':
+            with open(osp.join(self.benchmark_setting.benchmark_path, task,
+                               game, 'annotation.json'),
+                      'r',
+                      encoding='utf-8') as json_file:
+                annotation = json.load(json_file)
+            assert annotation['game'] == game
+            assert annotation['task'] == task
+            assert len(annotation['annotations']
+                       ) == self.benchmark_setting.sample_size
+
+        game_cfg_path = f'configs/games/{game}.py'
+        game_cfg = AutoConfigurator.fromfile(game_cfg_path)
+
+        agent = self.agent if task == 'e2e' else self.offline_agent
+        evaluator = Evaluator(game_cfg,
+                              agent,
+                              task,
+                              self.log_file,
+                              self.save_path,
+                              game_cfg_path=game_cfg_path,
+                              agent_cfg_path=self.agent_cfg_path)
+        return evaluator, annotation, game_cfg
 
     def run_experiments(self):
+        if self.recipe.work_queue:
+            return self.run_queued()
+
         tasks = self.recipe.tasks
         games = self.recipe.games
 
@@ -73,58 +121,20 @@ class Recipe:
                                                ] * self.recipe.repetition_round
                     self.save_record()
 
-                if task != 'e2e':
-                    with open(osp.join(self.benchmark_setting.benchmark_path,
-                                       task, game, 'annotation.json'),
-                              'r',
-                              encoding='utf-8') as json_file:
-                        annotation = json.load(json_file)
-                    assert annotation['game'] == game
-                    assert annotation['task'] == task
-                    assert len(annotation['annotations']
-                               ) == self.benchmark_setting.sample_size
-
+                evaluator, annotation, game_cfg = self.setup_task(task, game)
                 completed_rounds = self.record[task][game]
 
-                game_cfg = AutoConfigurator.fromfile(
-                    f'configs/games/{game}.py')
-
-                evaluator = Evaluator(game_cfg, self.agent, task,
-                                      self.log_file, self.save_path)
-
-                while None in completed_rounds:
-                    next_round = completed_rounds.index(None)
-
-                    print(f'Running experiment for task: {task}, '
-                          f'game: {game}, round: {next_round + 1}')
-
-                    try:
-                        if task != 'e2e':
-                            batch = {
-                                'task':
-                                task,
-                                'screenshot_path':
-                                osp.join(self.benchmark_setting.benchmark_path,
-                                         task, game, f'{next_round:07d}.jpg'),
-                                'gt':
-                                annotation['annotations'][next_round]['gt'],
-                                'game_cfg':
-                                game_cfg
-                            }
-                        else:
-                            batch = {'task': task, 'game_cfg': game_cfg}
-                        result, simulator = evaluator.run(batch)
-                        simulator.cleanup()
-                        self.record[task][game][next_round] = result
-                        self.save_record()
-                        completed_rounds = self.record[task][game]
-                    except Exception as e:
-                        print(
-                            f'Error occurred during task {task}, game {game}, '
-                            f'round {next_round + 1}: {e}')
-                        continue
+                if task != 'e2e':
+                    asyncio.run(
+                        self.run_offline(task, game, evaluator, annotation,
+                                         game_cfg))
+
+                while task == 'e2e' and None in completed_rounds:
+                    self.run_e2e(task, game, evaluator)
+                    completed_rounds = self.record[task][game]
 
                 print(f'Task: {task}, game: {game} has been completed.')
+                self.save_record()
 
                 torch.cuda.synchronize()
                 evaluator.cleanup()
@@ -132,10 +142,206 @@ class Recipe:
                 torch.cuda.empty_cache()
                 gc.collect()
 
+    def run_e2e(self, task, game, evaluator):
+        """Play the pending e2e rounds of a game, ``e2e_parallel`` games at a
+        time, recording each result as soon as its game ends."""
+        indices = [
+            index for index, result in enumerate(self.record[task][game])
+            if result is None
+        ]
+        print(f'Running experiment for task: {task}, game: {game}, '
+              f"round: {', '.join(str(index + 1) for index in indices)}")
+        for index, result in evaluator.run_e2e_games(
+                indices, self.recipe.e2e_parallel or 1):
+            if isinstance(result, Exception):
+                print(f'Error occurred during task {task}, game {game}, '
+                      f'round {index + 1}: {result}')
+            else:
+                self.record_result(task, game, index, result)
+
+    def run_queued(self):
+        """Drain the recipe's shared ``work_queue`` together with any other
+        workers running the same recipe. The first worker to find it empty
+        merges every round completed by any of them into the record."""
+        lease_seconds = self.recipe.lease_seconds or 600
+        max_attempts = self.recipe.max_attempts or 3
+        queue = SQLiteWorkQueue(self.recipe.work_queue,
+                                lease_seconds,
+                                max_attempts=max_attempts)
+        queue.add([(task, game, index) for task in self.recipe.tasks
+                   for game in self.recipe.games
+                   for index, result in enumerate(self.record[task][game])
+                   if result is None])
+
+        contexts = {}
+        waiting = None
+        while True:
+            units = queue.lease(self.lease_limit)
+            if not units:
+                unfinished = queue.unfinished()
+                if unfinished == 0:
+                    break
+                if unfinished != waiting:
+                    print(f'Waiting for {unfinished} rounds leased by other '
+                          'workers.')
+                    waiting = unfinished
+                time.sleep(min(lease_seconds, QUEUE_POLL_SECONDS))
+                continue
+
+            waiting = None
+            task, game = units[0][:2]
+            if (task, game) not in contexts:
+                contexts[task, game] = self.setup_task(task, game)
+            evaluator, annotation, game_cfg = contexts[task, game]
+            self.run_rounds(queue, units, evaluator, annotation, game_cfg)
+
+        failed = queue.failed()
+        if failed:
+            print(f'{failed} rounds failed {max_attempts} times and will be '
+                  'retried on the next run.')
+        if queue.claim_merge():
+            for task, game, index, result in queue.results():
+                set_result(self.record, task, game, index, result)
+            self.save_record()
+            print('All rounds in the work queue have been completed and '
+                  'merged into the record.')
+        else:
+            print('All rounds in the work queue have been completed; another '
+                  'worker merges them into the record.')
+        queue.close()
+
+    def lease_limit(self, task):
+        """Number of rounds of ``task`` leased at a time: the e2e games
+        played together, or the offline batches kept in flight and
+        prefetched."""
+        if task == 'e2e':
+            return self.recipe.e2e_parallel or 1
+        prefetch = self.recipe.prefetch
+        prefetch = 0 if prefetch == 0 else prefetch or 2
+        return (self.recipe.batch_size or 1) * (
+            (self.recipe.concurrency or 1) + prefetch)
+
+    def run_rounds(self, queue, units, evaluator, annotation, game_cfg):
+        """Run leased rounds of one (task, game), completing each in the
+        queue as soon as its result arrives and releasing the failed ones.
+        The leases are renewed by a heartbeat for as long as the rounds
+        run."""
+        task, game = units[0][:2]
+        indices = [index for _, _, index in units]
+
+        def on_result(index, result):
+            unit = (task, game, index)
+            if result is None:
+                queue.release([unit])
+            elif not queue.complete(unit, result, GameStatusEncoder):
+                print(f'The lease of task {task}, game {game}, round '
+                      f'{index + 1} was lost; its result is discarded.')
+
+        with queue.heartbeat(units):
+            if task != 'e2e':
+                asyncio.run(
+                    self.schedule_offline(task, game, evaluator, annotation,
+                                          game_cfg, indices, on_result))
+                return
+
+            rounds = ', '.join(str(index + 1) for index in indices)
+            print(f'Running experiment for task: {task}, game: {game}, '
+                  f'round: {rounds}')
+            for index, result in evaluator.run_e2e_games(
+                    indices, self.recipe.e2e_parallel or 1):
+                if isinstance(result, Exception):
+                    print(f'Error occurred during task {task}, game {game}, '
+                          f'round {index + 1}: {result}')
+                    result = None
+                on_result(index, result)
+
+    def offline_batch(self, task, game, index, annotation, game_cfg):
+        return {
+            'task':
+            task,
+            'screenshot_path':
+            osp.join(self.benchmark_setting.benchmark_path, task, game,
+                     f'{index:07d}.jpg'),
+            'gt':
+            annotation['annotations'][index]['gt'],
+            'game_cfg':
+            game_cfg
+        }
+
+    async def run_offline(self, task, game, evaluator, annotation, game_cfg):
+        """Answer the pending samples of an offline task, writing each result
+        to its own ``record[task][game][index]`` slot as soon as its batch
+        returns."""
+        indices = [
+            index for index, result in enumerate(self.record[task][game])
+            if result is None
+        ]
+
+        def on_result(index, result):
+            if result is not None:
+                self.record_result(task, game, index, result)
+
+        await self.schedule_offline(task, game, evaluator, annotation,
+                                    game_cfg, indices, on_result)
+        failed = self.record[task][game].count(None)
+        if failed:
+            print(f'{failed} rounds of task {task}, game {game} failed and '
+                  'will be retried on the next run.')
+
+    async def schedule_offline(self, task, game, evaluator, annotation,
+                               game_cfg, indices, on_result):
+        """Answer the offline samples ``indices`` in batches of
+        ``batch_size``, with up to ``concurrency`` batches in flight, calling
+        ``on_result(index, result)`` as soon as a batch returns (None for
+        the samples of a failed batch). The screenshots of the next
+        ``prefetch`` batches are prepared in the background meanwhile."""
+        concurrency = self.recipe.concurrency or 1
+        batch_size = self.recipe.batch_size or 1
+        prefetch = self.recipe.prefetch
+        prefetcher = None
+        if prefetch != 0:
+            prefetcher = ImagePrefetcher(evaluator.agent.prepare_image,
+                                         depth=prefetch or 2)
+        loop = asyncio.get_running_loop()
+        loop.set_default_executor(ThreadPoolExecutor(max_workers=concurrency))
+        pending = deque()
+        for i in range(0, len(indices), batch_size):
+            chunk = indices[i:i + batch_size]
+            pending.append((chunk, [
+                self.offline_batch(task, game, index, annotation, game_cfg)
+                for index in chunk
+            ]))
+
+        async def worker():
+            while pending:
+                chunk, batches = pending.popleft()
+                rounds = ', '.join(str(index + 1) for index in chunk)
+                print(f'Running experiment for task: {task}, '
+                      f'game: {game}, round: {rounds}')
+                try:
+                    if prefetcher is not None:
+                        await prefetcher.load(batches,
+                                              (ahead for _, ahead in pending))
+                    results = await evaluator.run_offline(batches)
+                except Exception as e:
+                    print(f'Error occurred during task {task}, game {game}, '
+                          f'round {rounds}: {e}')
+                    results = [None] * len(chunk)
+                for index, result in zip(chunk, results):
+                    on_result(index, result)
+
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        if prefetcher is not None:
+            prefetcher.shutdown()
+
     def cleanup(self):
         """Clean up resources at the end of the experiment."""
         if hasattr(self.agent, 'model'):
             del self.agent.model
+        if isinstance(self.offline_agent, CachedAgent):
+            self.offline_agent.cache.close()
+        del self.offline_agent
         del self.agent
+        self.journal.close()
         torch.cuda.empty_cache()
         gc.collect()
@@ -0,0 +1,212 @@
+import json
+import os
+import os.path as osp
+import socket
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+
+class SQLiteWorkQueue:
+    """Queue of ``(task, game, index)`` rounds shared by several workers.
+
+    A worker leases pending rounds for ``lease_seconds``; rounds whose lease
+    expires (e.g. the worker died) become available again. A round leased
+    ``max_attempts`` times without completing is marked failed, so that the
+    queue can drain; it is retried when it is enqueued again by a later run.
+    Completed rounds keep their result in the queue, which is the source of
+    truth merged into the experiment record.
+
+    Any number of processes can drain one queue. On one machine any local
+    disk works. Workers on several machines need the database on a shared
+    filesystem whose POSIX byte-range locks work across clients, such as NFS
+    with its lock manager running (not mounted with ``nolock``). SQLite
+    relies on those locks; without them concurrent workers can corrupt the
+    queue. The rollback journal is used because WAL mode keeps a
+    shared-memory index that only works for processes on the same host.
+    """
+
+    def __init__(self,
+                 path,
+                 lease_seconds=600,
+                 worker_id=None,
+                 max_attempts=3):
+        os.makedirs(osp.dirname(osp.abspath(path)), exist_ok=True)
+        self.path = path
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.worker_id = worker_id or f'{socket.gethostname()}:{os.getpid()}'
+        self.db = sqlite3.connect(path, timeout=60, isolation_level=None)
+        self.db.execute('PRAGMA journal_mode=DELETE')
+        self.db.execute('CREATE TABLE IF NOT EXISTS rounds ('
+                        'task TEXT NOT NULL, game TEXT NOT NULL, '
+                        'idx INTEGER NOT NULL, seq INTEGER NOT NULL, '
+                        "state TEXT NOT NULL DEFAULT 'pending', "
+                        'owner TEXT, expires REAL, result TEXT, '
+                        'attempts INTEGER NOT NULL DEFAULT 0, '
+                        'PRIMARY KEY (task, game, idx))')
+        self.db.execute('CREATE INDEX IF NOT EXISTS rounds_state '
+                        'ON rounds (state, seq)')
+        self.db.execute('CREATE TABLE IF NOT EXISTS flags '
+                        '(name TEXT PRIMARY KEY)')
+
+    @contextmanager
+    def transaction(self):
+        """Write transaction taking the database lock up front, so that
+        concurrent workers never lease the same rounds."""
+        self.db.execute('BEGIN IMMEDIATE')
+        try:
+            yield
+        except BaseException:
+            self.db.execute('ROLLBACK')
+            raise
+        self.db.execute('COMMIT')
+
+    def add(self, units):
+        """Enqueue rounds given as ``(task, game, index)``. Failed rounds get
+        a new set of attempts; other rounds already in the queue, pending or
+        done, are left untouched."""
+        with self.transaction():
+            seq = self.db.execute(
+                'SELECT COALESCE(MAX(seq), 0) FROM rounds').fetchone()[0]
+            added = self.db.executemany(
+                'INSERT OR IGNORE INTO rounds (task, game, idx, seq) '
+                'VALUES (?, ?, ?, ?)',
+                [(task, game, index, seq + i + 1)
+                 for i, (task, game, index) in enumerate(units)]).rowcount
+            retried = self.db.executemany(
+                'UPDATE rounds SET state = ?, attempts = 0 '
+                'WHERE task = ? AND game = ? AND idx = ? AND state = ?',
+                [('pending', *unit, 'failed') for unit in units]).rowcount
+            if added or retried:
+                self.db.execute('DELETE FROM flags WHERE name = ?',
+                                ('merged', ))
+
+    def lease(self, limit=1):
+        """Lease up to ``limit`` rounds of the same task and game, oldest
+        first. ``limit`` may also be a function of the task. Returns a list
+        of ``(task, game, index)``."""
+        now = time.time()
+        with self.transaction():
+            # Rounds whose last attempt expired with their worker.
+            self.db.execute(
+                'UPDATE rounds SET state = ?, owner = NULL, expires = NULL '
+                'WHERE state = ? AND expires < ? AND attempts >= ?',
+                ('failed', 'leased', now, self.max_attempts))
+            first = self.db.execute(
+                'SELECT task, game FROM rounds WHERE state = ? OR '
+                '(state = ? AND expires < ?) ORDER BY seq LIMIT 1',
+                ('pending', 'leased', now)).fetchone()
+            if first is None:
+                return []
+            if callable(limit):
+                limit = limit(first[0])
+            rows = self.db.execute(
+                'SELECT idx FROM rounds WHERE task = ? AND game = ? AND '
+                '(state = ? OR (state = ? AND expires < ?)) '
+                'ORDER BY seq LIMIT ?',
+                (*first, 'pending', 'leased', now, limit)).fetchall()
+            units = [(*first, idx) for idx, in rows]
+            self.db.executemany(
+                'UPDATE rounds SET state = ?, owner = ?, expires = ?, '
+                'attempts = attempts + 1 WHERE task = ? AND game = ? '
+                'AND idx = ?',
+                [('leased', self.worker_id, now + self.lease_seconds, *unit)
+                 for unit in units])
+        return units
+
+    def renew(self, units):
+        """Extend the lease of rounds still held by this worker."""
+        expires = time.time() + self.lease_seconds
+        with self.transaction():
+            self.db.executemany(
+                'UPDATE rounds SET expires = ? WHERE task = ? AND game = ? '
+                'AND idx = ? AND state = ? AND owner = ?',
+                [(expires, *unit, 'leased', self.worker_id) for unit in units])
+
+    @contextmanager
+    def heartbeat(self, units):
+        """Keep the leases of ``units`` alive while the block runs, renewing
+        them every third of ``lease_seconds`` from a background thread with
+        its own connection. Rounds completed or released meanwhile are left
+        alone, since ``renew`` only extends rounds still leased by this
+        worker."""
+        stop = threading.Event()
+
+        def beat():
+            queue = SQLiteWorkQueue(self.path, self.lease_seconds,
+                                    self.worker_id, self.max_attempts)
+            try:
+                while not stop.wait(self.lease_seconds / 3):
+                    try:
+                        queue.renew(units)
+                    except sqlite3.Error as e:
+                        print(f'Failed to renew the leases of {units}: {e}')
+            finally:
+                queue.close()
+
+        thread = threading.Thread(target=beat,
+                                  name='lease-heartbeat',
+                                  daemon=True)
+        thread.start()
+        try:
+            yield
+        finally:
+            stop.set()
+            thread.join()
+
+    def complete(self, unit, result, encoder=None):
+        """Store the result of a round leased by this worker and mark it
+        done. Returns False, storing nothing, if the lease has passed to
+        another worker."""
+        result = json.dumps(result, cls=encoder)
+        with self.transaction():
+            return self.db.execute(
+                'UPDATE rounds SET state = ?, result = ?, expires = NULL '
+                'WHERE task = ? AND game = ? AND idx = ? AND state = ? '
+                'AND owner = ?', ('done', result, *unit, 'leased',
+                                  self.worker_id)).rowcount == 1
+
+    def release(self, units):
+        """Give leased rounds back after a failure, so that any worker can
+        retry them. They go to the back of the queue, or are marked failed
+        once they have used ``max_attempts`` leases."""
+        rows = [(self.max_attempts, *unit, 'leased', self.worker_id)
+                for unit in units]
+        with self.transaction():
+            self.db.executemany(
+                "UPDATE rounds SET state = CASE WHEN attempts >= ? "
+                "THEN 'failed' ELSE 'pending' END, owner = NULL, "
+                'expires = NULL, seq = (SELECT MAX(seq) FROM rounds) + 1 '
+                'WHERE task = ? AND game = ? AND idx = ? AND state = ? '
+                'AND owner = ?', rows)
+
+    def unfinished(self):
+        """Number of rounds neither done nor failed, including the leased
+        ones."""
+        query = 'SELECT COUNT(*) FROM rounds WHERE state IN (?, ?)'
+        return self.db.execute(query, ('pending', 'leased')).fetchone()[0]
+
+    def failed(self):
+        """Number of rounds that ran out of attempts."""
+        query = 'SELECT COUNT(*) FROM rounds WHERE state = ?'
+        return self.db.execute(query, ('failed', )).fetchone()[0]
+
+    def claim_merge(self):
+        """Whether this worker is the first to claim merging the results
+        since rounds were last added. Only the claimant writes the merged
+        record."""
+        with self.transaction():
+            return self.db.execute(
+                'INSERT OR IGNORE INTO flags (name) VALUES (?)',
+                ('merged', )).rowcount == 1
+
+    def results(self):
+        """Yield ``(task, game, index, result)`` for every completed round."""
+        query = 'SELECT task, game, idx, result FROM rounds WHERE state = ?'
+        for task, game, index, result in self.db.execute(query, ('done', )):
+            yield task, game, index, json.loads(result)
+
+    def close(self):
+        self.db.close()
@@ -8,6 +8,16 @@ class BaseGame:
         self.status = GameStatus.IN_PROGRESS
         self.game_cfg = game_cfg
 
+    def create_renderer(self, qt_renderer, raster_renderer):
+        """Build the renderer backend selected by ``game_cfg.renderer``:
+        the Qt widget tree (default) or the headless NumPy rasterizer."""
+        backend = self.game_cfg.renderer or 'qt'
+        if backend == 'qt':
+            return qt_renderer(self.logic)
+        elif backend == 'raster':
+            return raster_renderer(self.logic)
+        raise ValueError(f'Invalid renderer: {backend}')
+
     def get_screenshot(self):
         raise NotImplementedError
 
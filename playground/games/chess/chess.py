@@ -6,7 +6,9 @@ import chess.engine
 from PyQt5.QtWidgets import QMainWindow
 
 from playground.games import BaseGame, BaseGameLogic
+from playground.games.chess.chess_raster import ChessRasterRenderer
 from playground.games.chess.chess_ui import ChessUI
+from playground.games.chess.engine_pool import DEFAULT_STOCKFISH, ENGINE_POOL
 from playground.registry import GAME_REGISTRY
 from playground.state_code import GameStatus
 
@@ -211,17 +213,15 @@ class Chess(BaseGame):
         super().__init__(game_cfg)
         self.logic = ChessLogic(game_cfg)
         self.renderer = None
-        self.engine = chess.engine.SimpleEngine.popen_uci(
-            '/usr/games/stockfish')
-
-    def __del__(self):
-        """Cleanup engine resources."""
-        if hasattr(self, 'engine'):
-            self.engine.quit()
+        self.stockfish_path = game_cfg.stockfish_path or DEFAULT_STOCKFISH
+        # Identifies this game to the engine, which is sent ``ucinewgame``
+        # whenever it plays a move for a different game than before.
+        self.engine_game = object()
 
     def get_screenshot(self):
         if self.renderer is None:
-            self.renderer = ChessRenderer(self.logic)
+            self.renderer = self.create_renderer(ChessRenderer,
+                                                 ChessRasterRenderer)
         return self.renderer.get_screenshot()
 
     def input_move(self, move):
@@ -236,13 +236,39 @@ class Chess(BaseGame):
     def get_rule_state(self):
         return self.logic.get_rule_state()
 
+    def adversary_limit(self):
+        """Search limit and engine options of the opponent, from the
+        ``adversary`` config. Any of ``nodes``, ``depth`` and ``time`` bound
+        the search, one second per move when none is set. With a
+        ``reference_nps``, ``time`` is scaled by the speed of this host
+        relative to it. ``skill_level`` (0-20) weakens Stockfish."""
+        adversary = self.game_cfg.adversary
+        if not adversary:
+            return chess.engine.Limit(time=1.0), {}
+        limit = chess.engine.Limit(nodes=adversary.nodes,
+                                   depth=adversary.depth,
+                                   time=adversary.time)
+        if not (limit.nodes or limit.depth or limit.time):
+            limit.time = 1.0
+        if limit.time and adversary.reference_nps:
+            nps = ENGINE_POOL.nodes_per_second(self.stockfish_path)
+            limit.time *= adversary.reference_nps / nps
+        options = {}
+        if adversary.skill_level is not None:
+            options['Skill Level'] = adversary.skill_level
+        return limit, options
+
     def ai_move(self):
         """Calculate and apply AI move using Stockfish."""
         if not self.AI_component or self.logic.status != GameStatus.IN_PROGRESS:  # noqa
             return None
 
-        result = self.engine.play(self.logic.board,
-                                  chess.engine.Limit(time=1.0))
+        limit, options = self.adversary_limit()
+        with ENGINE_POOL.lease(self.stockfish_path) as engine:
+            result = engine.play(self.logic.board,
+                                 limit,
+                                 game=self.engine_game,
+                                 options=options)
         chess_move = result.move
         if chess_move in self.logic.board.legal_moves:
             san_move = self.logic.board.san(chess_move)
@@ -36,7 +36,7 @@ class ChessQuestionAnswering(BaseQuestionAnswering):
                 'pawn', 'knight', 'bishop', 'rook', 'queen', 'king', 'empty'
             ]
             base_pool.append('unknown')
-            base_pool = list(set(base_pool))
+            base_pool = list(dict.fromkeys(base_pool))
             if correct_answer not in base_pool:
                 base_pool.append(correct_answer)
             possible_options = base_pool
@@ -72,7 +72,7 @@ class ChessQuestionAnswering(BaseQuestionAnswering):
         else:
             possible_options = [correct_answer, '???', '???2', '???3']
 
-        possible_options = list(set(possible_options))
+        possible_options = list(dict.fromkeys(possible_options))
         if correct_answer in possible_options:
             possible_options.remove(correct_answer)
         random.shuffle(possible_options)
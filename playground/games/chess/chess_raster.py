@@ -0,0 +1,54 @@
+from functools import lru_cache
+
+import playground.games.chess.common.common as common
+from playground.games.chess.common.consts import PIECE_MAP
+from playground.games.raster import Backdrop, Canvas, load_sprite, text_sprite
+
+SIZE = 800
+SQR_SIZE = SIZE // 10
+LIGHT = (0xF0, 0xD9, 0xB5)
+DARK = (0xB5, 0x88, 0x63)
+BLACK = (0, 0, 0)
+PIECE_DIR = 'playground/games/chess/assets/pieces'
+
+
+@lru_cache(maxsize=None)
+def background():
+    """Empty board framed by the file and rank labels on all four sides."""
+    canvas = Canvas(SIZE, SIZE)
+    for row in range(8):
+        for col in range(8):
+            color = LIGHT if (row + col) % 2 == 0 else DARK
+            canvas.fill_rect((col + 1) * SQR_SIZE, (row + 1) * SQR_SIZE,
+                             SQR_SIZE, SQR_SIZE, color)
+    for i in range(8):
+        file_label = text_sprite('abcdefgh'[i], 19, BLACK, bold=True)
+        rank_label = text_sprite('87654321'[i], 19, BLACK, bold=True)
+        for edge in (0, 9):
+            canvas.paste_centered(file_label, (i + 1) * SQR_SIZE,
+                                  edge * SQR_SIZE, SQR_SIZE, SQR_SIZE)
+            canvas.paste_centered(rank_label, edge * SQR_SIZE,
+                                  (i + 1) * SQR_SIZE, SQR_SIZE, SQR_SIZE)
+    return Backdrop(canvas)
+
+
+class ChessRasterRenderer:
+    """Headless renderer drawing the same layout as the Qt board."""
+
+    def __init__(self, logic):
+        self.logic = logic
+
+    def get_screenshot(self):
+        backdrop = background()
+        canvas = backdrop.canvas()
+        for sqr_index in range(64):
+            piece = self.logic.board.piece_at(sqr_index)
+            if not piece:
+                continue
+            col, row = common.square_to_coords[common.squares_san[sqr_index]]
+            sprite = load_sprite(
+                f'{PIECE_DIR}/{PIECE_MAP[piece.symbol()]}.png', SQR_SIZE,
+                SQR_SIZE)
+            backdrop.stamp(canvas, sprite, (col + 1) * SQR_SIZE,
+                           (row + 1) * SQR_SIZE)
+        return canvas.to_image()
@@ -10,6 +10,24 @@ from playground.games.chess.common.consts import PIECE_CONVERSION, PIECE_MAP
 from playground.games.chess.position import Position
 
 SQR_SIZE = 100
+PIECE_DIR = './playground/games/chess/assets/pieces'
+
+_PIECE_ATLAS = {}
+
+
+def piece_pixmap(piece_symbol, size):
+    """Process-wide atlas of piece sprites keyed by piece symbol and square
+    size. Each sprite is decoded and scaled once, on first use."""
+    key = (piece_symbol, size)
+    if key not in _PIECE_ATLAS:
+        pixmap_path = f'{PIECE_DIR}/{PIECE_MAP[piece_symbol]}.png'
+        if not os.path.exists(pixmap_path):
+            print(f'Image not found: {pixmap_path}')
+            _PIECE_ATLAS[key] = None
+        else:
+            _PIECE_ATLAS[key] = QPixmap(pixmap_path).scaled(
+                size, size, Qt.IgnoreAspectRatio, Qt.SmoothTransformation)
+    return _PIECE_ATLAS[key]
 
 
 class ChessUI(QWidget):
@@ -28,6 +46,7 @@ class ChessUI(QWidget):
         self.position = Position(common.starting_fen)
         self.search_thread = SearchThread(self)
         self.pieces = {}
+        self.spare_pieces = []
         self.selected_piece = None
         self.selected_square = None
         self.draw_board_with_labels()
@@ -85,6 +104,9 @@ class ChessUI(QWidget):
             lbl.setFont(font)
             self.layout.addWidget(lbl, row + 1, 9)
 
+    def square_size(self):
+        return min(self.width(), self.height()) // 10
+
     def place_piece(self, sqr_name, piece):
         if isinstance(piece, str):
             piece_symbol = piece
@@ -100,16 +122,32 @@ class ChessUI(QWidget):
             print(f'Unknown piece: {piece_symbol}')
             return
 
-        piece_label = PieceLabel(self, piece_image)
-        pixmap_path = f'./playground/games/chess/assets/pieces/{piece_image}.png'  # noqa
-        if not os.path.exists(pixmap_path):
-            print(f'Image not found: {pixmap_path}')
+        piece_label = self.pieces.get(sqr_name)
+        if piece_label is None:
+            if self.spare_pieces:
+                piece_label = self.spare_pieces.pop()
+                piece_label.show()
+            else:
+                piece_label = PieceLabel(self, piece_image)
+            col, row = common.square_to_coords[sqr_name]
+            self.layout.addWidget(piece_label, row + 1, col + 1)
+            self.pieces[sqr_name] = piece_label
+        elif piece_label.piece == piece_image:
+            return
+
+        piece_label.piece = piece_image
+        pixmap = piece_pixmap(piece_symbol, self.square_size())
+        if pixmap is None:
+            piece_label.clear()
         else:
-            piece_label.setPixmap(QPixmap(pixmap_path))
+            piece_label.setPixmap(pixmap)
 
-        col, row = common.square_to_coords[sqr_name]
-        self.layout.addWidget(piece_label, row + 1, col + 1)
-        self.pieces[sqr_name] = piece_label
+    def remove_piece(self, sqr_name):
+        """Take the label off a square and keep it for reuse."""
+        piece_label = self.pieces.pop(sqr_name)
+        self.layout.removeWidget(piece_label)
+        piece_label.hide()
+        self.spare_pieces.append(piece_label)
 
     def move_piece(self, src_sqr, dst_sqr):
         piece = self.pieces.get(src_sqr)
@@ -172,18 +210,22 @@ class ChessUI(QWidget):
             self.place_piece(sqr, piece)
 
     def refresh_from_state(self):
-        self.clear()
+        """Sync the labels with the position, touching only the squares
+        whose piece changed since the last refresh."""
+        occupied = {}
         for sqr_index in range(64):
             piece = self.position.piece_at(sqr_index)
-            sqr_name = common.squares_san[sqr_index]
             if piece:
-                self.place_piece(sqr_name, piece.symbol())
+                occupied[common.squares_san[sqr_index]] = piece.symbol()
+        for sqr_name in list(self.pieces):
+            if sqr_name not in occupied:
+                self.remove_piece(sqr_name)
+        for sqr_name, piece_symbol in occupied.items():
+            self.place_piece(sqr_name, piece_symbol)
 
     def clear(self):
-        all_pieces = self.findChildren(QLabel)
-        for piece in all_pieces:
-            if isinstance(piece, PieceLabel):
-                piece.setParent(None)
+        for sqr_name in list(self.pieces):
+            self.remove_piece(sqr_name)
 
 
 class PieceLabel(QLabel):
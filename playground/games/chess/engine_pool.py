@@ -0,0 +1,101 @@
+import threading
+from contextlib import contextmanager, suppress
+
+import chess.engine
+
+DEFAULT_STOCKFISH = '/usr/games/stockfish'
+# Search time used to measure the speed of an engine on this host.
+CALIBRATION_TIME = 1.0
+
+
+class EnginePool:
+    """Process-wide pool of UCI engines, keyed by executable path.
+
+    Engines are started lazily, the first time a move is requested, and
+    returned to the pool afterwards, so consecutive games (or games played in
+    parallel threads) reuse warm engines instead of starting one process per
+    game. An engine that fails is quit rather than pooled. ``close`` quits
+    every pooled engine; it also runs at interpreter exit.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.idle = {}
+        self.speed = {}
+        self.closed = False
+
+    @contextmanager
+    def lease(self, path=DEFAULT_STOCKFISH):
+        """Borrow an engine for ``path``, starting one if none is idle."""
+        with self.lock:
+            if self.closed:
+                raise RuntimeError('The engine pool is closed.')
+            engines = self.idle.setdefault(path, [])
+            engine = engines.pop() if engines else None
+        if engine is None:
+            engine = chess.engine.SimpleEngine.popen_uci(path)
+        try:
+            yield engine
+        except BaseException:
+            engine.close()
+            raise
+        with self.lock:
+            if not self.closed:
+                self.idle[path].append(engine)
+                return
+        engine.quit()
+
+    def nodes_per_second(self, path=DEFAULT_STOCKFISH):
+        """Search speed of the engine at ``path`` on this host, measured once
+        from the start position."""
+        if path not in self.speed:
+            with self.lease(path) as engine:
+                info = engine.analyse(
+                    chess.Board(), chess.engine.Limit(time=CALIBRATION_TIME))
+            nps = info.get('nps') or info.get('nodes', 0) / CALIBRATION_TIME
+            if not nps:
+                raise RuntimeError(f'Failed to measure the speed of {path}.')
+            self.speed[path] = nps
+        return self.speed[path]
+
+    def close(self):
+        """Quit all idle engines. Engines leased at that moment are quit
+        when they are returned."""
+        with self.lock:
+            self.closed = True
+            engines = [e for pool in self.idle.values() for e in pool]
+            self.idle = {}
+        for engine in engines:
+            try:
+                engine.quit()
+            except (chess.engine.EngineError, RuntimeError):
+                # The engine died, or its event loop has already stopped.
+                with suppress(RuntimeError):
+                    engine.close()
+
+
+def close_at_exit(pool):
+    """Close ``pool`` when the interpreter exits.
+
+    Each engine is served by a non-daemon thread, which the interpreter joins
+    before running ``atexit`` callbacks, so the pool must be closed earlier.
+    Like ``concurrent.futures``, use the hook that runs before those threads
+    are joined. It is private to CPython, so where it is missing a daemon
+    thread closes the pool once the main thread has finished.
+    """
+    register = getattr(threading, '_register_atexit', None)
+    if register is not None:
+        register(pool.close)
+        return
+
+    def close_after_main_thread():
+        threading.main_thread().join()
+        pool.close()
+
+    threading.Thread(target=close_after_main_thread,
+                     name='engine-pool-exit',
+                     daemon=True).start()
+
+
+ENGINE_POOL = EnginePool()
+close_at_exit(ENGINE_POOL)
@@ -1,177 +1,293 @@
+import time
+from functools import lru_cache
+
+# Cells whose stones put a cell in the search frontier: up to two steps
+# along a row, column or diagonal.
+NEIGHBOURS = [(di * step, dj * step)
+              for di, dj in ((-1, 0), (1, 0), (-1, 1), (1, -1), (0, 1),
+                             (0, -1), (1, 1), (-1, -1)) for step in (1, 2)]
+# Value of a won position, above any pattern score.
+WIN = 10**9
+# Plies searched when the game config sets no ``search_depth``.
+SEARCH_DEPTH = 3
+
+# Score of a stone in a run of ``length`` (keys capped at 5) with
+# ``open_ends`` empty cells at its ends.
+RUN_SCORES = {
+    5: (200000, 200000, 200000),
+    4: (0, 1000, 70000),
+    3: (0, 150, 1000),
+    2: (0, 150, 1000),
+    1: (0, 0, 0),
+}
+
+
+def color_line_score(cells, color):
+    """Pattern score of the stones of ``color`` in one line of the board,
+    the cells listed along direction (1, 0), (1, -1), (0, 1) or (1, 1). The
+    board edge counts as an opponent stone. Summed over all lines this is
+    ``AI.evaluateBoard``: runs score per stone by their length and open
+    ends, a stone followed by an opponent stone scores 10, and five-cell
+    windows starting at a stone score the broken fours. The last two terms
+    count four times, as ``evaluateBoard`` adds them once per axis."""
+    opponent = 3 - color
+    size = len(cells)
+    value = 0
+    k = 0
+    while k < size:
+        if cells[k] != color:
+            k += 1
+            continue
+        start = k
+        while k < size and cells[k] == color:
+            k += 1
+        open_before = start > 0 and cells[start - 1] == 0
+        open_after = k < size and cells[k] == 0
+        open_ends = open_before + open_after
+        length = k - start
+        value += length * RUN_SCORES[min(length, 5)][open_ends]
+    for k in range(size):
+        if cells[k] != color:
+            continue
+        if k + 1 < size and cells[k + 1] == opponent:
+            value += 4 * 10
+        if k + 4 < size:
+            window = cells[k:k + 5]
+            if window.count(0) == 1 and window.count(color) == 4:
+                if window[1] == 0 or window[3] == 0:
+                    value += 4 * 3000
+                if window[2] == 0:
+                    value += 4 * 2600
+    return value
+
+
+@lru_cache(maxsize=2**16)
+def line_score(cells):
+    """Evaluation of one line, given as ``bytes``, for white (2) minus black
+    (1)."""
+    return color_line_score(cells, 2) - color_line_score(cells, 1)
+
+
+def board_lines(size):
+    """Slices of a flat ``size * size`` board selecting every row, column
+    and diagonal, each along its direction (1, 0), (1, -1), (0, 1) or
+    (1, 1)."""
+    lines = []
+    for j in range(size):
+        lines.append(slice(j, size * size, size))
+    for start in range(2 * size - 1):
+        i, j = max(0, start - size + 1), min(start, size - 1)
+        length = min(size - i, j + 1)
+        first = i * size + j
+        lines.append(
+            slice(first, first + (length - 1) * (size - 1) + 1, size - 1))
+    for i in range(size):
+        lines.append(slice(i * size, (i + 1) * size))
+    for start in range(2 * size - 1):
+        i, j = max(0, size - 1 - start), max(0, start - size + 1)
+        length = min(size - i, size - j)
+        first = i * size + j
+        lines.append(
+            slice(first, first + (length - 1) * (size + 1) + 1, size + 1))
+    return lines
+
+
+class LineEvaluator:
+    """Board evaluation kept up to date incrementally.
+
+    The value of ``AI.evaluateBoard(2) - AI.evaluateBoard(1)`` is a sum of
+    per-line scores, so changing a cell only rescores the four lines through
+    it. Line scores are memoized by the line's contents.
+    """
+
+    def __init__(self, board, size):
+        self.board = board
+        self.lines = board_lines(size)
+        self.cell_lines = [[] for _ in range(size * size)]
+        cells = range(size * size)
+        for index, line in enumerate(self.lines):
+            for cell in cells[line]:
+                self.cell_lines[cell].append(index)
+        self.scores = [self.score(line) for line in self.lines]
+        self.value = sum(self.scores)
+
+    def score(self, line):
+        return line_score(bytes(self.board[line]))
+
+    def update(self, cell):
+        """Rescore the lines through a cell after its state changed."""
+        for index in self.cell_lines[cell]:
+            score = self.score(self.lines[index])
+            self.value += score - self.scores[index]
+            self.scores[index] = score
+
+
+class SearchTimeout(Exception):
+    """Raised inside the search when its time budget is spent."""
+
+
 class AI:
+    """Gomoku opponent: negamax alpha-beta search with iterative deepening.
+
+    The board is a flat ``bytearray`` with cell ``(row, col)`` at
+    ``row * size + col``, which the search updates in place. Candidate moves
+    are the empty cells of a frontier, the cells up to two steps away from a
+    stone along a row, column or diagonal, kept up to date as stones are
+    placed and removed. Moves are tried in order of how much they gain for
+    the side to move plus how much they would gain for the opponent.
+    """
 
-    def __init__(self, chessboard):
-        self.chessboard = chessboard
-        self.size = len(chessboard)
+    def __init__(self, board, size):
+        self.board = board
+        self.size = size
         self.count = 0
+        self.evaluator = LineEvaluator(board, size)
+        self.deadline = None
+        self.near = [0] * (size * size)
+        self.frontier = set()
+        for cell, state in enumerate(board):
+            if state != 0:
+                self.mark(cell, 1)
 
-    def ai(self, color, deep, pre_evaluate):
-        if deep >= 2:
-            temp = self.evaluateBoard(2, self.chessboard) - self.evaluateBoard(
-                1, self.chessboard)
-            return temp
-        if color == 2:
-            values = -100000000
-        else:
-            values = 100000000
-        for i in range(15):
-            for j in range(15):
-                if self.chessboard[i][j][2] == 0:
-                    if self.judge_empty(i, j):
-                        continue
-                    self.chessboard[i][j][2] = color
-                    evaluate = self.ai(3 - color, deep + 1, values)
-                    if color == 2:
-                        if evaluate > pre_evaluate:
-                            self.chessboard[i][j][2] = 0
-                            self.count += 1
-                            return 100000000
-                    else:
-                        if evaluate < pre_evaluate:
-                            self.chessboard[i][j][2] = 0
-                            self.count += 1
-                            return -100000000
-                    if color == 2:
-                        if evaluate >= values:
-                            values = evaluate
-                    else:
-                        if evaluate <= values:
-                            values = evaluate
-                    self.chessboard[i][j][2] = 0
-        return values
-
-    def judge_empty(self, m, n):
-        directions = [(-1, 0), (1, 0), (-1, 1), (1, -1), (0, 1), (0, -1),
-                      (1, 1), (-1, -1)]
-        j = 0
-        count = 1
-        while j < len(directions):
-            a = 0
-            while a <= 1:
-                x, y = m, n
-                a += 1
-                for i in range(2):
-                    if x + directions[j][0] < 0 or x + directions[j][
-                            0] > self.size - 1 or y + directions[j][
-                                1] < 0 or y + directions[j][1] > self.size - 1:
-                        break
-                    x += directions[j][0]
-                    y += directions[j][1]
-                    if self.chessboard[x][y][2] == 0:
-                        count += 1
+    def place(self, cell, state):
+        """Set a cell (0 to clear it) and update the evaluation and the
+        frontier."""
+        previous = self.board[cell]
+        self.board[cell] = state
+        self.evaluator.update(cell)
+        if state and not previous:
+            self.frontier.discard(cell)
+            self.mark(cell, 1)
+        elif previous and not state:
+            self.mark(cell, -1)
+            if self.near[cell]:
+                self.frontier.add(cell)
+
+    def mark(self, cell, delta):
+        """Count a stone on ``cell`` in (or out of) the neighbourhood of the
+        cells around it."""
+        i, j = divmod(cell, self.size)
+        for di, dj in NEIGHBOURS:
+            x, y = i + di, j + dj
+            if 0 <= x < self.size and 0 <= y < self.size:
+                other = x * self.size + y
+                self.near[other] += delta
+                if self.board[other] == 0:
+                    if self.near[other]:
+                        self.frontier.add(other)
                     else:
-                        break
-                j += 1
-        if count == 17:
-            return 1
-        return 0
-
-    def judge(self, m, n):
-        directions = [(-1, 0), (1, 0), (-1, 1), (1, -1), (0, 1), (0, -1),
-                      (1, 1), (-1, -1)]
-        j = 0
-        while j < len(directions):
+                        self.frontier.discard(other)
+
+    def wins(self, cell):
+        """Whether the stone on ``cell`` completes five in a row."""
+        color = self.board[cell]
+        i, j = divmod(cell, self.size)
+        for di, dj in ((1, 0), (0, 1), (1, 1), (1, -1)):
             count = 1
-            a = 0
-            while a <= 1:
-                x, y = m, n
-                a += 1
-                for i in range(4):
-                    if x + directions[j][0] < 0 or x + directions[j][
-                            0] > self.size - 1 or y + directions[j][
-                                1] < 0 or y + directions[j][1] > self.size - 1:
-                        break
-                    x += directions[j][0]
-                    y += directions[j][1]
-                    if self.chessboard[x][y][2] == self.chessboard[m][n][2]:
-                        count += 1
-                    else:
-                        break
-                j += 1
+            for sign in (1, -1):
+                x, y = i + sign * di, j + sign * dj
+                while (0 <= x < self.size and 0 <= y < self.size
+                       and self.board[x * self.size + y] == color):
+                    count += 1
+                    x, y = x + sign * di, y + sign * dj
             if count >= 5:
-                if self.chessboard[m][n][2] == 2:
-                    return 1
-        return 0
-
-    def evaluateBoard(self, color, chessboard):
-        values = 0
-        directions = [(-1, 0), (1, 0), (-1, 1), (1, -1), (0, 1), (0, -1),
-                      (1, 1), (-1, -1)]
-        directions_2 = [(1, 0), (1, -1), (0, 1), (1, 1)]
-        for row in range(self.size):
-            for col in range(self.size):
-                if chessboard[row][col][2] != color:
-                    continue
-                j = 0
-                while j < len(directions):
-                    count = 1
-                    a = 0
-                    record = []
-                    while a <= 1:
-                        x, y = row, col
-                        a += 1
-                        for i in range(4):
-                            if x + directions[j][0] < 0 or x + directions[j][
-                                    0] > self.size - 1 or y + directions[j][
-                                        1] < 0 or y + directions[j][
-                                            1] > self.size - 1:
-                                record.append(3 - color)
-                                break
-                            x += directions[j][0]
-                            y += directions[j][1]
-                            if chessboard[x][y][2] == chessboard[row][col][2]:
-                                count += 1
-                            else:
-                                record.append(chessboard[x][y][2])
-                                break
-                        j += 1
-                    if count >= 5:
-                        values += 200000
-                    elif count == 4:
-                        if record[0] == record[1] == 0:
-                            values += 70000
-                        elif (record[0] == 0 and record[1] == (3 - color)) or (
-                                record[0] == (3 - color) and record[1] == 0):
-                            values += 1000
-                    elif count == 3:
-                        if record[0] == record[1] == 0:
-                            values += 1000
-                        elif (record[0] == 0 and record[1] == (3 - color)) or (
-                                record[0] == (3 - color) and record[1] == 0):
-                            values += 150
-                    elif count == 2:
-                        if record[0] == record[1] == 0:
-                            values += 1000
-                        elif (record[0] == 0 and record[1] == (3 - color)) or (
-                                record[0] == (3 - color) and record[1] == 0):
-                            values += 150
-                    k = 0
-                    while k < len(directions_2):
-                        x, y = row, col
-                        record = []
-                        record.append(chessboard[x][y][2])
-                        for i in range(4):
-                            if i == 1 and len(record) == 2:
-                                if record[0] != record[1] and record[
-                                        0] and record[1]:
-                                    values += 10
-                            if x + directions_2[k][0] < 0 or x + directions_2[
-                                    k][0] > self.size - 1 or y + directions_2[
-                                        k][1] < 0 or y + directions_2[k][
-                                            1] > self.size - 1:
-                                break
-                            x += directions_2[k][0]
-                            y += directions_2[k][1]
-                            record.append(chessboard[x][y][2])
-                        if len(record) == 5:
-                            count = record.count(0)
-                            if (count == 1 and record[1] == 0
-                                    and record.count(color)
-                                    == 4) or (count == 1 and record[3] == 0
-                                              and record.count(color) == 4):
-                                values += 3000
-                            if count == 1 and record[2] == 0 and record.count(
-                                    color) == 4:
-                                values += 2600
-                        k += 1
-        return values
+                return True
+        return False
+
+    def gain(self, cell, color):
+        """Evaluation change, for ``color``, of playing ``cell``."""
+        before = self.evaluator.value
+        self.place(cell, color)
+        after = self.evaluator.value
+        self.place(cell, 0)
+        return after - before if color == 2 else before - after
+
+    def ordered_moves(self, color, first=None):
+        """Frontier cells, best first by attack plus defence gain, in a
+        stable order for equal scores."""
+        moves = sorted(self.frontier)
+        scores = {
+            move: self.gain(move, color) + self.gain(move, 3 - color)
+            for move in moves
+        }
+        moves.sort(key=lambda move: (move != first, -scores[move]))
+        return moves
+
+    def best_move(self, color=2, depth=SEARCH_DEPTH, time_budget=None):
+        """Best ``(row, col)`` for ``color``, searching 1, 2, ... ``depth``
+        plies. With a ``time_budget`` in seconds, the move of the deepest
+        finished iteration is returned once it is spent. Returns None on a
+        full board."""
+        if not self.frontier:
+            if any(self.board):
+                return None
+            return self.size // 2, self.size // 2
+
+        self.deadline = None
+        if time_budget:
+            self.deadline = time.monotonic() + time_budget
+        best = None
+        for max_depth in range(1, depth + 1):
+            try:
+                best, value = self.search_root(color, max_depth, best)
+            except SearchTimeout:
+                break
+            if abs(value) >= WIN:
+                break
+        if best is None:
+            best = self.ordered_moves(color)[0]
+        return divmod(best, self.size)
+
+    def search_root(self, color, depth, first=None):
+        alpha, beta = -float('inf'), float('inf')
+        best = None
+        for cell in self.ordered_moves(color, first):
+            value = self.child_value(cell, color, depth, alpha, beta)
+            if best is None or value > alpha:
+                alpha = value
+                best = cell
+        return best, alpha
+
+    def child_value(self, cell, color, depth, alpha, beta):
+        """Value, for ``color``, of playing ``cell`` and searching the reply
+        ``depth - 1`` plies deep."""
+        self.place(cell, color)
+        try:
+            if self.wins(cell):
+                # Prefer the quickest win.
+                return WIN + depth
+            return -self.search(3 - color, depth - 1, -beta, -alpha)
+        finally:
+            self.place(cell, 0)
+
+    def search(self, color, depth, alpha, beta):
+        """Negamax value of the position for ``color`` to move."""
+        sign = 1 if color == 2 else -1
+        if depth == 0 or not self.frontier:
+            return sign * self.evaluator.value
+        if self.deadline is not None and time.monotonic() > self.deadline:
+            raise SearchTimeout
+        self.count += 1
+        # Above the horizon the order drives the cutoffs. Just above it,
+        # scoring the moves would cost as much as evaluating the children.
+        if depth > 1:
+            moves = self.ordered_moves(color)
+        else:
+            moves = sorted(self.frontier)
+        best = -float('inf')
+        for cell in moves:
+            value = self.child_value(cell, color, depth, alpha, beta)
+            if value > best:
+                best = value
+            if value > alpha:
+                alpha = value
+            if alpha >= beta:
+                break
+        return best
+
+    def evaluateBoard(self, color, board):
+        """Pattern score of the stones of ``color``, computed from scratch.
+        The search uses the incrementally updated ``evaluator`` instead."""
+        return sum(
+            color_line_score(bytes(board[line]), color)
+            for line in self.evaluator.lines)
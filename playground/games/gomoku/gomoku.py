@@ -1,16 +1,80 @@
 import random
 import re
-from copy import deepcopy
+from functools import lru_cache
 
+import numpy as np
 from PyQt5.QtGui import QPainter, QPixmap
 from PyQt5.QtWidgets import QLabel, QMainWindow
 
 from playground.games import BaseGame, BaseGameLogic
-from playground.games.gomoku.AI import AI
+from playground.games.gomoku.AI import AI, SEARCH_DEPTH
+from playground.games.gomoku.gomoku_raster import (STONE, GomokuRasterRenderer,
+                                                   stone_positions)
 from playground.games.gomoku.gomoku_ui import Ui_MainWindow
 from playground.registry import GAME_REGISTRY
 from playground.state_code import GameStatus
 
+# Directions (row step, column step) of the lines checked for five in a row:
+# rows, columns, diagonals and anti-diagonals.
+LINE_DIRECTIONS = ((0, 1), (1, 0), (1, 1), (1, -1))
+
+
+def _span(step, size, offset):
+    """Slice of the coordinates of the ``offset``-th stone of the runs of
+    five along ``step`` that fit on the board."""
+    start = 4 if step < 0 else 0
+    stop = size - 4 if step > 0 else size
+    return slice(start + offset * step, stop + offset * step)
+
+
+@lru_cache(maxsize=None)
+def line_windows(size):
+    """For each of ``LINE_DIRECTIONS``, the ``(rows, cols)`` slices of the
+    first to fifth stones of every run of five that fits on the board."""
+    return [[(_span(dr, size, offset), _span(dc, size, offset))
+             for offset in range(5)] for dr, dc in LINE_DIRECTIONS]
+
+
+def five_in_a_row(boards):
+    """Find the runs of five stones of one colour on a batch of boards.
+
+    ``boards`` has shape ``(..., size, size)``. The result is a boolean array
+    of shape ``(..., 4, size, size)``, True where a run starts at that cell
+    along the matching ``LINE_DIRECTIONS`` entry. Longer runs start at
+    several cells.
+    """
+    boards = np.asarray(boards)
+    size = boards.shape[-1]
+    runs = np.zeros(boards.shape[:-2] + (len(LINE_DIRECTIONS), size, size),
+                    dtype=bool)
+    for i, spans in enumerate(line_windows(size)):
+        first = boards[(..., *spans[0])]
+        run = first != 0
+        for span in spans[1:]:
+            run &= boards[(..., *span)] == first
+        runs[(..., i, *spans[0])] = run
+    return runs
+
+
+def strip_fives(boards):
+    """Clear stones of a ``(count, size, size)`` batch of boards, in place,
+    until none has five in a row. Each pass clears a random stone of the
+    first run left on every board, rescanning only the boards just
+    changed."""
+    size = boards.shape[-1]
+    directions = np.array(LINE_DIRECTIONS)
+    active = np.arange(boards.shape[0])
+    while active.size:
+        runs = five_in_a_row(boards[active]).reshape(active.size, -1)
+        found = runs.any(axis=1)
+        active = active[found]
+        direction, cell = np.divmod(runs[found].argmax(axis=1), size * size)
+        offset = np.random.randint(5, size=active.size)
+        row = cell // size + offset * directions[direction, 0]
+        col = cell % size + offset * directions[direction, 1]
+        boards[active, row, col] = 0
+    return boards
+
 
 class GomokuLogic(BaseGameLogic):
     """Pure logic for Gomoku game."""
@@ -18,16 +82,18 @@ class GomokuLogic(BaseGameLogic):
     def __init__(self, game_cfg):
         self.game_cfg = game_cfg
         self.size = game_cfg.chessboard_size
-        self.board = [[[40 + j * 64, 40 + i * 64, 0] for j in range(self.size)]
-                      for i in range(self.size)]
+        # Cell (row, col) is board[row * size + col]: 0 empty, 1 black,
+        # 2 white.
+        self.board = bytearray(self.size * self.size)
         self.status = GameStatus.IN_PROGRESS
 
     def make_move(self, row, col, player):
         """Make a move on the board and check game status."""
         if not (0 <= row < self.size and 0 <= col < self.size) or self.board[
-                row][col][2] != 0 or self.status != GameStatus.IN_PROGRESS:
+                row * self.size +
+                col] != 0 or self.status != GameStatus.IN_PROGRESS:
             return False
-        self.board[row][col][2] = player
+        self.board[row * self.size + col] = player
         self._judge(row, col)
         return True
 
@@ -35,26 +101,25 @@ class GomokuLogic(BaseGameLogic):
         """Check if the move leads to a win or tie."""
         directions = [(-1, 0), (1, 0), (-1, 1), (1, -1), (0, 1), (0, -1),
                       (1, 1), (-1, -1)]
-        player = self.board[row][col][2]
+        player = self.board[row * self.size + col]
         for dx, dy in directions:
             count = 1
             for step in range(1, 5):
                 x, y = row + step * dx, col + step * dy
-                if not (0 <= x < self.size and
-                        0 <= y < self.size) or self.board[x][y][2] != player:
+                if not (0 <= x < self.size and 0 <= y < self.size
+                        ) or self.board[x * self.size + y] != player:
                     break
                 count += 1
             for step in range(1, 5):
                 x, y = row - step * dx, col - step * dy
-                if not (0 <= x < self.size and
-                        0 <= y < self.size) or self.board[x][y][2] != player:
+                if not (0 <= x < self.size and 0 <= y < self.size
+                        ) or self.board[x * self.size + y] != player:
                     break
                 count += 1
             if count >= 5:
                 self.status = GameStatus.WIN if player == 1 else GameStatus.LOSE  # noqa
                 return
-        if all(self.board[i][j][2] != 0 for i in range(self.size)
-               for j in range(self.size)):
+        if 0 not in self.board:
             self.status = GameStatus.TIE
 
     def input_move(self, move):
@@ -70,8 +135,8 @@ class GomokuLogic(BaseGameLogic):
             row, col = row_dict[match.group(1)], int(match.group(2))
         else:
             col, row = int(match.group(3)), row_dict[match.group(4)]
-        if not (0 <= row < self.size
-                and 0 <= col < self.size) or self.board[row][col][2] != 0:
+        if not (0 <= row < self.size and 0 <= col < self.size
+                ) or self.board[row * self.size + col] != 0:
             return GameStatus.INVALID_MOVE
         self.make_move(row, col, 1)  # Player is black (1)
         return self.status
@@ -81,8 +146,7 @@ class GomokuLogic(BaseGameLogic):
 
     def reset_board(self):
         """Reset the game board."""
-        self.board = [[[40 + j * 64, 40 + i * 64, 0] for j in range(self.size)]
-                      for i in range(self.size)]
+        self.board = bytearray(self.size * self.size)
         self.status = GameStatus.IN_PROGRESS
 
     def get_random_state(self):
@@ -97,53 +161,33 @@ class GomokuLogic(BaseGameLogic):
         pieces = [1] * black_stones + [2] * white_stones + [0] * (total_cells -
                                                                   total_stones)
         random.shuffle(pieces)
-        for i in range(self.size):
-            for j in range(self.size):
-                self.board[i][j][2] = pieces[i * self.size + j]
-        return [[self.board[i][j][2] for j in range(self.size)]
-                for i in range(self.size)]
+        self.board[:] = bytes(pieces)
+        return self.get_state()
+
+    def get_state(self):
+        """Board as a list of rows, as stored in the annotations."""
+        return [
+            list(self.board[i * self.size:(i + 1) * self.size])
+            for i in range(self.size)
+        ]
 
     def get_rule_state(self):
         """Generate a rule state with valid movements."""
-        game_state = self.get_random_state()
-        directions = [(-1, 0), (1, 0), (-1, 1), (1, -1), (0, 1), (0, -1),
-                      (1, 1), (-1, -1)]
+        self.get_random_state()
+        # A view of the board, so stripping the fives updates it in place.
+        board = np.frombuffer(self.board, dtype=np.uint8)
+        strip_fives(board.reshape(1, self.size, self.size))
 
-        def count_consecutive(x, y, dx, dy):
-            count = 1
-            stone = self.board[x][y][2]
-            for step in range(1, 5):
-                nx, ny = x + step * dx, y + step * dy
-                if not (0 <= nx < self.size and
-                        0 <= ny < self.size) or self.board[nx][ny][2] != stone:
-                    break
-                count += 1
-            return count
-
-        for i in range(self.size):
-            for j in range(self.size):
-                if self.board[i][j][2] != 0:
-                    for dx, dy in directions:
-                        count = count_consecutive(i, j, dx, dy)
-                        if count >= 5:
-                            rand_idx = random.randint(0, count - 1)
-                            x, y = i + rand_idx * dx, j + rand_idx * dy
-                            self.board[x][y][2] = 0
-                            game_state[x][y] = 0
-
-        valid_movement = []
         letters = 'ABCDEFGHIJKLMNO'
-        for row in range(self.size):
-            for col in range(self.size):
-                if self.board[row][col][2] == 0:
-                    valid_movement.append(f'{letters[row]}{col + 1}')
-        return game_state, valid_movement
+        valid_movement = [
+            f'{letters[cell // self.size]}{cell % self.size + 1}'
+            for cell in np.flatnonzero(board == 0)
+        ]
+        return self.get_state(), valid_movement
 
     def calculate_score(self):
         """Calculate score based on player's steps and game outcome."""
-        player_steps = sum(1 for i in range(self.size)
-                           for j in range(self.size)
-                           if self.board[i][j][2] == 1)
+        player_steps = self.board.count(1)
         base_score = player_steps * 10
         bonus_score = 0
         if self.status == GameStatus.WIN:
@@ -165,6 +209,10 @@ class GomokuLogic(BaseGameLogic):
         return GameStatus.INVALID_MOVE
 
 
+# Stone pixmaps shared by all renderers, loaded once a QApplication exists.
+STONES = {}
+
+
 class GomokuRenderer(QMainWindow):
     """Renderer for Gomoku UI."""
 
@@ -173,39 +221,37 @@ class GomokuRenderer(QMainWindow):
         self.ui = Ui_MainWindow()
         self.ui.setupUi(self)
         self.logic = logic
-        self.black = QPixmap(
-            'playground/games/gomoku/designer/image/black.png')
-        self.white = QPixmap(
-            'playground/games/gomoku/designer/image/white.png')
-        self.pieces = [
-            QLabel(self) for _ in range(self.logic.size * self.logic.size)
-        ]
-        for piece in self.pieces:
-            piece.setVisible(True)
+        if not STONES:
+            STONES[1] = QPixmap(
+                'playground/games/gomoku/designer/image/black.png')
+            STONES[2] = QPixmap(
+                'playground/games/gomoku/designer/image/white.png')
+        self.pieces = []
+        for x, y in stone_positions(self.logic.size):
+            piece = QLabel(self)
+            piece.setGeometry(x, y, STONE, STONE)
+            piece.setVisible(False)
             piece.setScaledContents(True)
+            self.pieces.append(piece)
+        self.rendered = bytearray(len(self.logic.board))
         self._update_ui()
 
     def _update_ui(self):
-        """Update UI based on current game state."""
-        step = 0
-        for i in range(self.logic.size):
-            for j in range(self.logic.size):
-                state = self.logic.board[i][j][2]
-                if state == 1:
-                    self.pieces[step].setPixmap(self.black)
-                    self.pieces[step].setGeometry(
-                        self.logic.board[i][j][0] - 16,
-                        self.logic.board[i][j][1] - 16, 64, 64)
-                    step += 1
-                elif state == 2:
-                    self.pieces[step].setPixmap(self.white)
-                    self.pieces[step].setGeometry(
-                        self.logic.board[i][j][0] - 16,
-                        self.logic.board[i][j][1] - 16, 64, 64)
-                    step += 1
+        """Update the cells whose state changed since the last render."""
+        for cell, state in enumerate(self.logic.board):
+            if state == self.rendered[cell]:
+                continue
+            self.rendered[cell] = state
+            piece = self.pieces[cell]
+            if state in STONES:
+                piece.setPixmap(STONES[state])
+                piece.setVisible(True)
+            else:
+                piece.setVisible(False)
 
     def get_screenshot(self):
         """Generate screenshot of the current board."""
+        self._update_ui()
         board_width = 1000
         board_height = 1000
         screenshot = QPixmap(board_width, board_height)
@@ -226,8 +272,8 @@ class Gomoku(BaseGame):
 
     def get_screenshot(self):
         if self.renderer is None:
-            self.renderer = GomokuRenderer(self.logic)
-        self.renderer._update_ui()
+            self.renderer = self.create_renderer(GomokuRenderer,
+                                                 GomokuRasterRenderer)
         return self.renderer.get_screenshot()
 
     def input_move(self, move):
@@ -247,26 +293,12 @@ class Gomoku(BaseGame):
         if not self.AI_component or self.logic.status != GameStatus.IN_PROGRESS:  # noqa
             return None
 
-        board_copy = deepcopy(self.logic.board)
-        ai = AI(board_copy)
-        values = -100000000
-        best_move = [-1, -1, 2]  # [row, col, player]
-
-        for i in range(self.logic.size):
-            for j in range(self.logic.size):
-                if board_copy[i][j][2] == 0:
-                    if ai.judge_empty(i, j):
-                        continue
-                    board_copy[i][j][2] = 2
-                    evaluate = ai.ai(1, 1, values)
-                    if evaluate >= values:
-                        values = evaluate
-                        best_move = [i, j, 2]
-                    board_copy[i][j][2] = 0
-
-        if best_move[0] != -1 and best_move[1] != -1:
-            row, col, player = best_move
-            if self.logic.make_move(row, col, player):
+        ai = AI(bytearray(self.logic.board), self.logic.size)
+        best_move = ai.best_move(2, self.game_cfg.search_depth or SEARCH_DEPTH,
+                                 self.game_cfg.search_time)
+        if best_move is not None:
+            row, col = best_move
+            if self.logic.make_move(row, col, 2):
                 letters = 'ABCDEFGHIJKLMNO'
                 return f'{letters[row]}{col + 1}'
         return None
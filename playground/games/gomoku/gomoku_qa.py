@@ -48,7 +48,7 @@ class GomokuQuestionAnswering(BaseQuestionAnswering):
             if correct_answer not in possible_options:
                 possible_options.append(correct_answer)
 
-        possible_options = list(set(possible_options))
+        possible_options = list(dict.fromkeys(possible_options))
         if correct_answer in possible_options:
             possible_options.remove(correct_answer)
         random.shuffle(possible_options)
@@ -0,0 +1,40 @@
+from functools import lru_cache
+
+from playground.games.raster import Backdrop, Canvas, load_sprite
+
+WIDTH, HEIGHT = 1000, 1000
+IMAGE_DIR = 'playground/games/gomoku/designer/image'
+STONE = 64
+STONE_IMAGES = {1: f'{IMAGE_DIR}/black.png', 2: f'{IMAGE_DIR}/white.png'}
+
+
+@lru_cache(maxsize=None)
+def stone_positions(size):
+    """Top-left pixel of the stone sprite of each cell, in board order."""
+    return [(24 + col * 64, 24 + row * 64) for row in range(size)
+            for col in range(size)]
+
+
+@lru_cache(maxsize=None)
+def background():
+    board = load_sprite(f'{IMAGE_DIR}/chessboard.png', WIDTH, HEIGHT)
+    canvas = Canvas(WIDTH, HEIGHT)
+    canvas.paste(board, 0, 0)
+    return Backdrop(canvas)
+
+
+class GomokuRasterRenderer:
+    """Headless renderer drawing the same layout as the Qt window."""
+
+    def __init__(self, logic):
+        self.logic = logic
+        self.positions = stone_positions(logic.size)
+
+    def get_screenshot(self):
+        backdrop = background()
+        canvas = backdrop.canvas()
+        for (x, y), state in zip(self.positions, self.logic.board):
+            if state in STONE_IMAGES:
+                stone = load_sprite(STONE_IMAGES[state], STONE, STONE)
+                backdrop.stamp(canvas, stone, x, y)
+        return canvas.to_image()
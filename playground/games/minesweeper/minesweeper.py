@@ -7,6 +7,8 @@ from PyQt5.QtWidgets import QMainWindow
 
 from playground.games import BaseGame, BaseGameLogic
 from playground.games.minesweeper.game_cfg import LEVELS, STATUS_ICONS
+from playground.games.minesweeper.minesweeper_raster import \
+    MinesweeperRasterRenderer
 from playground.games.minesweeper.minesweeper_ui import MinesweeperUI
 from playground.registry import GAME_REGISTRY
 from playground.state_code import GameStatus
@@ -174,6 +176,16 @@ class MinesweeperLogic(BaseGameLogic):
         return GameStatus.INVALID_MOVE
 
 
+# Status icons shared by all renderers, loaded once a QApplication exists.
+STATUS_QICONS = {}
+
+
+def status_icon(status):
+    if status not in STATUS_QICONS:
+        STATUS_QICONS[status] = QIcon(STATUS_ICONS[status])
+    return STATUS_QICONS[status]
+
+
 class MinesweeperRenderer(QMainWindow):
     """Renderer for Minesweeper UI."""
 
@@ -182,6 +194,13 @@ class MinesweeperRenderer(QMainWindow):
         self.logic = logic
         self.ui = MinesweeperUI(self, self.logic.b_size)
         self.setCentralWidget(self.ui.centralwidget)
+        self.cells = [[
+            self.ui.gameGrid.itemAtPosition(y + 1, x + 1).widget()
+            for x in range(self.logic.b_size)
+        ] for y in range(self.logic.b_size)]
+        self.rendered = [[None] * self.logic.b_size
+                         for _ in range(self.logic.b_size)]
+        self.rendered_status = None
         self._update_ui_from_logic()
         self.adjust_window_size()
         self.show()
@@ -192,22 +211,25 @@ class MinesweeperRenderer(QMainWindow):
         self.setFixedSize(window_width, window_height)
 
     def _update_ui_from_logic(self):
-        """Sync UI with logic state."""
+        """Sync UI with logic state, repainting only the changed cells."""
         self.ui.minesLabel.setText(f'{self.logic.n_mines:03d}')
         elapsed = int(
             time.time()
         ) - self.logic.timer_start if self.logic.status == GameStatus.IN_PROGRESS else 0  # noqa
         self.ui.clockLabel.setText(f'{elapsed:03d}')
-        self.ui.statusButton.setIcon(QIcon(STATUS_ICONS[self.logic.status]))
+        if self.logic.status != self.rendered_status:
+            self.rendered_status = self.logic.status
+            self.ui.statusButton.setIcon(status_icon(self.logic.status))
         for y in range(self.logic.b_size):
             for x in range(self.logic.b_size):
-                widget = self.ui.gameGrid.itemAtPosition(y + 1, x + 1).widget()
-                widget.is_mine = (self.logic.board[y][x] in [9, 10])
-                widget.is_revealed = (self.logic.board[y][x] >= 0
-                                      and self.logic.board[y][x] != 9
-                                      ) or self.logic.board[y][x] == 10
-                widget.adjacent_n = self.logic.board[y][
-                    x] if widget.is_revealed and not widget.is_mine else 0
+                value = self.logic.board[y][x]
+                if value == self.rendered[y][x]:
+                    continue
+                self.rendered[y][x] = value
+                widget = self.cells[y][x]
+                widget.is_mine = (value in [9, 10])
+                widget.is_revealed = (value >= 0 and value != 9) or value == 10
+                widget.adjacent_n = value if widget.is_revealed and not widget.is_mine else 0  # noqa
                 widget.update()
 
     def get_screenshot(self):
@@ -234,7 +256,8 @@ class MineSweeper(BaseGame):
 
     def get_screenshot(self):
         if self.renderer is None:
-            self.renderer = MinesweeperRenderer(self.logic)
+            self.renderer = self.create_renderer(MinesweeperRenderer,
+                                                 MinesweeperRasterRenderer)
         return self.renderer.get_screenshot()
 
     def input_move(self, move):
@@ -33,7 +33,7 @@ class MinesweeperQuestionAnswering(BaseQuestionAnswering):
         possible_options = []
 
         possible_pool = ['mine'] + [str(i) for i in range(9)]
-        possible_options = list(set(possible_pool))
+        possible_options = list(dict.fromkeys(possible_pool))
         if correct_answer not in possible_options:
             possible_options.append(correct_answer)
 
@@ -53,7 +53,7 @@ class MinesweeperQuestionAnswering(BaseQuestionAnswering):
             if correct_answer not in possible_options:
                 possible_options.append(correct_answer)
 
-        possible_options = list(set(possible_options))
+        possible_options = list(dict.fromkeys(possible_options))
         if correct_answer in possible_options:
             possible_options.remove(correct_answer)
         random.shuffle(possible_options)
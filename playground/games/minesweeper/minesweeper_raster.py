@@ -0,0 +1,94 @@
+import string
+import time
+from functools import lru_cache
+
+from playground.games.minesweeper.game_cfg import NUM_COLORS, STATUS_ICONS
+from playground.games.raster import Backdrop, Canvas, load_sprite, text_sprite
+from playground.state_code import GameStatus
+
+BOMB = 'playground/games/minesweeper/images/bomb.png'
+CLOCK = 'playground/games/minesweeper/images/clock-select.png'
+CELL = 20
+ICON = 32
+FONT_SIZE = 17
+BLACK = (0, 0, 0)
+HIDDEN, HIDDEN_BORDER = (192, 192, 192), (176, 176, 178)
+
+
+def cell_positions(start, end, count):
+    """Spread ``count`` cells evenly between two edges, as the grid layout
+    does with the spare window space."""
+    step = (end - start) / max(count - 1, 1)
+    return [start + round(i * step) for i in range(count)]
+
+
+@lru_cache(maxsize=None)
+def layout(b_size):
+    width, height = 50 + b_size * CELL, 100 + b_size * CELL
+    xs = cell_positions(26, width - 26, b_size)
+    ys = cell_positions(76, height - 25, b_size)
+    header = (width - 94 - 12) // 3
+    return width, height, xs, ys, header
+
+
+@lru_cache(maxsize=None)
+def revealed_cell(value):
+    """Opened cell showing a bomb (9 and 10) or its adjacent mine count."""
+    cell = Canvas(CELL, CELL)
+    if value in [9, 10]:
+        cell.paste(load_sprite(BOMB, CELL, CELL), 0, 0)
+    elif value > 0:
+        color = tuple(NUM_COLORS[value].getRgb()[:3])
+        number = text_sprite(str(value), FONT_SIZE, color, bold=True)
+        cell.paste_centered(number, 0, 0, CELL, CELL)
+    return cell.to_sprite()
+
+
+@lru_cache(maxsize=None)
+def background(b_size):
+    """Window with the header icons, the labels and all cells hidden."""
+    width, height, xs, ys, header = layout(b_size)
+    canvas = Canvas(width, height)
+    canvas.paste(load_sprite(BOMB, ICON, ICON), 9, 12)
+    canvas.paste(load_sprite(CLOCK, ICON, ICON), width - 41, 12)
+    for i, x in enumerate(xs):
+        label = text_sprite(str(i + 1), FONT_SIZE, BLACK)
+        canvas.paste_centered(label, x, 53, CELL, 17)
+    for i, y in enumerate(ys):
+        label = text_sprite(string.ascii_lowercase[i], FONT_SIZE, BLACK)
+        canvas.paste_centered(label, 9, y, 11, CELL)
+    for y in ys:
+        for x in xs:
+            canvas.fill_rect(x, y, CELL, CELL, HIDDEN)
+            canvas.outline_rect(x, y, CELL, CELL, HIDDEN_BORDER)
+    return Backdrop(canvas)
+
+
+class MinesweeperRasterRenderer:
+    """Headless renderer drawing the same layout as the Qt window."""
+
+    def __init__(self, logic):
+        self.logic = logic
+
+    def get_screenshot(self):
+        logic = self.logic
+        width, height, xs, ys, header = layout(logic.b_size)
+        backdrop = background(logic.b_size)
+        canvas = backdrop.canvas()
+
+        elapsed = int(time.time(
+        )) - logic.timer_start if logic.status == GameStatus.IN_PROGRESS else 0
+        mines = text_sprite(f'{logic.n_mines:03d}', FONT_SIZE, BLACK)
+        clock = text_sprite(f'{elapsed:03d}', FONT_SIZE, BLACK)
+        backdrop.stamp(canvas, mines, 47, 9 + (38 - mines.height) // 2)
+        backdrop.stamp(canvas, clock, 47 + 2 * (header + 6),
+                       9 + (38 - clock.height) // 2)
+        status = load_sprite(STATUS_ICONS[logic.status], ICON, ICON)
+        backdrop.stamp_centered(canvas, status, 47 + header + 6, 9, header, 38)
+
+        for row, y in zip(logic.board, ys):
+            for value, x in zip(row, xs):
+                is_revealed = (value >= 0 and value != 9) or value == 10
+                if is_revealed:
+                    backdrop.stamp(canvas, revealed_cell(value), x, y)
+        return canvas.to_image()
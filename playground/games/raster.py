@@ -0,0 +1,179 @@
+"""Headless raster backend shared by the game renderers.
+
+Screenshots are composited into a NumPy RGB buffer from sprites that are
+decoded, scaled and (for text) rasterized once per process, so rendering
+needs neither Qt nor a ``QApplication``.
+"""
+import math
+import os.path as osp
+from functools import lru_cache
+
+import numpy as np
+from PIL import Image, ImageDraw, ImageFont
+
+WINDOW = (239, 239, 239)
+FONT_REGULAR = 'DejaVuSans.ttf'
+FONT_BOLD = 'DejaVuSans-Bold.ttf'
+SUPERSAMPLE = 4
+
+
+class Sprite:
+    """RGBA image pre-multiplied by its alpha, so compositing it costs one
+    multiply-add per channel."""
+
+    def __init__(self, rgba):
+        rgba = np.asarray(rgba, dtype=np.uint8)
+        alpha = rgba[..., 3:].astype(np.uint16)
+        self.height, self.width = rgba.shape[:2]
+        # The +127 rounds the division by 255 in Canvas.paste.
+        self.premultiplied = rgba[..., :3] * alpha + 127
+        self.inverse_alpha = 255 - alpha
+
+    @classmethod
+    def from_image(cls, image):
+        return cls(np.asarray(image.convert('RGBA')))
+
+
+class Canvas:
+    """RGB image buffer that sprites are composited into."""
+
+    def __init__(self, width, height, color=WINDOW):
+        self.pixels = np.empty((height, width, 3), dtype=np.uint8)
+        self.pixels[:] = color
+
+    @classmethod
+    def from_array(cls, pixels):
+        canvas = cls.__new__(cls)
+        canvas.pixels = pixels.copy()
+        return canvas
+
+    def copy(self):
+        return Canvas.from_array(self.pixels)
+
+    def fill_rect(self, x, y, width, height, color):
+        self.pixels[max(y, 0):y + height, max(x, 0):x + width] = color
+
+    def outline_rect(self, x, y, width, height, color):
+        """Draw a 1px outline covering the given rectangle."""
+        self.fill_rect(x, y, width, 1, color)
+        self.fill_rect(x, y + height - 1, width, 1, color)
+        self.fill_rect(x, y, 1, height, color)
+        self.fill_rect(x + width - 1, y, 1, height, color)
+
+    def paste(self, sprite, x, y):
+        """Alpha-blend a sprite with its top-left corner at (x, y)."""
+        x0, y0 = max(x, 0), max(y, 0)
+        x1 = min(x + sprite.width, self.pixels.shape[1])
+        y1 = min(y + sprite.height, self.pixels.shape[0])
+        if x0 >= x1 or y0 >= y1:
+            return
+        crop = (slice(y0 - y, y1 - y), slice(x0 - x, x1 - x))
+        region = self.pixels[y0:y1, x0:x1]
+        blended = region * sprite.inverse_alpha[crop]
+        blended += sprite.premultiplied[crop]
+        blended //= 255
+        region[:] = blended
+
+    def paste_centered(self, sprite, x, y, width, height):
+        """Paste a sprite centered in the given rectangle."""
+        self.paste(sprite, x + (width - sprite.width) // 2,
+                   y + (height - sprite.height) // 2)
+
+    def to_sprite(self):
+        alpha = np.full(self.pixels.shape[:2] + (1, ), 255, dtype=np.uint8)
+        return Sprite(np.concatenate([self.pixels, alpha], axis=2))
+
+    def to_image(self):
+        return Image.fromarray(self.pixels, 'RGB')
+
+
+class Backdrop:
+    """Static background of a renderer. A sprite stamped at a fixed spot is
+    blended over the background once and then copied into every frame, so
+    sprites must not overlap each other."""
+
+    def __init__(self, canvas):
+        self.pixels = canvas.pixels
+        self.tiles = {}
+
+    def canvas(self):
+        return Canvas.from_array(self.pixels)
+
+    def stamp(self, canvas, sprite, x, y):
+        key = (sprite, x, y)
+        if key not in self.tiles:
+            x0, y0 = max(x, 0), max(y, 0)
+            tile = Canvas.from_array(self.pixels[y0:y + sprite.height,
+                                                 x0:x + sprite.width])
+            tile.paste(sprite, x - x0, y - y0)
+            self.tiles[key] = (x0, y0, tile.pixels)
+        x0, y0, pixels = self.tiles[key]
+        height, width = pixels.shape[:2]
+        canvas.pixels[y0:y0 + height, x0:x0 + width] = pixels
+
+    def stamp_centered(self, canvas, sprite, x, y, width, height):
+        self.stamp(canvas, sprite, x + (width - sprite.width) // 2,
+                   y + (height - sprite.height) // 2)
+
+
+@lru_cache(maxsize=None)
+def load_sprite(path, width=None, height=None):
+    """Decode an image file into a sprite, optionally scaled. Missing files
+    give an empty sprite, like an empty ``QPixmap`` would."""
+    if not osp.exists(path):
+        return Sprite(np.zeros((0, 0, 4), dtype=np.uint8))
+    image = Image.open(path).convert('RGBA')
+    if width is not None and height is not None:
+        image = image.resize((width, height), Image.BILINEAR)
+    return Sprite.from_image(image)
+
+
+@lru_cache(maxsize=None)
+def font(size, bold=False):
+    try:
+        return ImageFont.truetype(FONT_BOLD if bold else FONT_REGULAR, size)
+    except OSError:
+        return ImageFont.load_default(size)
+
+
+@lru_cache(maxsize=4096)
+def text_sprite(text, size, color, bold=False):
+    """Rasterize a single line of text. The sprite spans the advance width
+    and the font height (ascent + descent), so centering it in a box lines
+    the text up the way Qt's ``AlignCenter`` does."""
+    text_font = font(size, bold)
+    ascent, descent = text_font.getmetrics()
+    width = max(math.ceil(text_font.getlength(text)), 1)
+    image = Image.new('RGBA', (width, ascent + descent), color + (0, ))
+    ImageDraw.Draw(image).text((0, 0),
+                               text,
+                               color + (255, ),
+                               font=text_font,
+                               anchor='la')
+    return Sprite.from_image(image)
+
+
+@lru_cache(maxsize=None)
+def disc_sprite(diameter, fill, outline=None):
+    """Anti-aliased filled circle with an optional 1px outline."""
+    size = diameter * SUPERSAMPLE
+    image = Image.new('RGBA', (size, size), fill + (0, ))
+    ImageDraw.Draw(image).ellipse(
+        (0, 0, size - 1, size - 1),
+        fill=fill + (255, ),
+        outline=None if outline is None else outline + (255, ),
+        width=SUPERSAMPLE)
+    return Sprite.from_image(image.resize((diameter, diameter), Image.LANCZOS))
+
+
+@lru_cache(maxsize=None)
+def button_sprite(width, height):
+    """Raised push button face as drawn by the default Qt style."""
+    shade = np.linspace(254, 237, height - 2).round().astype(np.uint8)
+    button = np.empty((height, width, 4), dtype=np.uint8)
+    button[..., 3] = 255
+    button[..., :3] = 171
+    button[1:-1, 1:-1, :3] = shade[:, None, None]
+    for y, x in ((0, 0), (0, -1), (-1, 0), (-1, -1)):
+        button[y, x, 3] = 0
+    return Sprite(button)
@@ -1,7 +1,108 @@
-import copy
+"""Reversi opponent searching bitboards.
+
+A position is two 64-bit ints, the discs of the side to move and of its
+opponent, with square ``(x, y)`` at bit ``y * 8 + x``. Moves are generated
+by shifting the discs along the eight directions, and a move is played by
+xoring its flipped discs in, so the search never copies a board.
+"""
+
+FULL = 0xffffffffffffffff
+NOT_A_FILE = 0xfefefefefefefefe
+NOT_H_FILE = 0x7f7f7f7f7f7f7f7f
+# (bit step, mask clearing the squares a shift wraps around to)
+DIRECTIONS = (
+    (1, NOT_A_FILE),  # x + 1
+    (-1, NOT_H_FILE),  # x - 1
+    (8, FULL),  # y + 1
+    (-8, FULL),  # y - 1
+    (9, NOT_A_FILE),  # x + 1, y + 1
+    (7, NOT_H_FILE),  # x - 1, y + 1
+    (-7, NOT_A_FILE),  # x + 1, y - 1
+    (-9, NOT_H_FILE),  # x - 1, y - 1
+)
+
+# Static square values used to order moves: corners first, then edges, and
+# the squares next to the corners last.
+SQUARE_VALUES = (
+    100, -20, 10, 5, 5, 10, -20, 100,
+    -20, -50, -2, -2, -2, -2, -50, -20,
+    10, -2, 1, 1, 1, 1, -2, 10,
+    5, -2, 1, 0, 0, 1, -2, 5,
+    5, -2, 1, 0, 0, 1, -2, 5,
+    10, -2, 1, 1, 1, 1, -2, 10,
+    -20, -50, -2, -2, -2, -2, -50, -20,
+    100, -20, 10, 5, 5, 10, -20, 100,
+)  # yapf: disable
+
+EXACT, LOWER, UPPER = 0, 1, 2
+
+
+def shift(bits, step, mask):
+    return ((bits << step) if step > 0 else (bits >> -step)) & mask
+
+
+def legal_moves(own, opp):
+    """Bitboard of the empty squares where ``own`` flips at least one
+    disc."""
+    empty = ~(own | opp) & FULL
+    moves = 0
+    for step, mask in DIRECTIONS:
+        run = shift(own, step, mask) & opp
+        for _ in range(5):
+            run |= shift(run, step, mask) & opp
+        moves |= shift(run, step, mask) & empty
+    return moves
+
+
+def flips(own, opp, square):
+    """Bitboard of the discs flipped when ``own`` plays ``square``."""
+    flipped = 0
+    move = 1 << square
+    for step, mask in DIRECTIONS:
+        run = 0
+        bit = shift(move, step, mask)
+        while bit & opp:
+            run |= bit
+            bit = shift(bit, step, mask)
+        if bit & own:
+            flipped |= run
+    return flipped
+
+
+def squares(bits):
+    """Indices of the set bits, lowest first."""
+    result = []
+    while bits:
+        low = bits & -bits
+        result.append(low.bit_length() - 1)
+        bits ^= low
+    return result
+
+
+def count(bits):
+    return bin(bits).count('1')
+
+
+def to_bitboards(board):
+    """Black (1) and white (2) discs of an 8x8 ``board[y][x]`` list."""
+    black = white = 0
+    for y, row in enumerate(board):
+        for x, cell in enumerate(row):
+            if cell == 1:
+                black |= 1 << (y * 8 + x)
+            elif cell == 2:
+                white |= 1 << (y * 8 + x)
+    return black, white
 
 
 class ReversiAI:
+    """Minimax opponent with alpha-beta pruning, move ordering and a
+    transposition table. White (2) maximizes and black (1) minimizes the
+    disc difference, counted for the side to move at the horizon. The
+    list-based helpers implement the game rules for ``ReversiLogic``."""
+
+    def __init__(self):
+        self.table = {}
 
     def valid_move(self, board, x, y, player):
         if board[y][x] != 0:
@@ -60,67 +161,118 @@ class ReversiAI:
                     b += 1
         return w, b
 
+    def bitboards(self, board, player):
+        """``(own, opp)`` discs of ``player`` and its opponent."""
+        black, white = to_bitboards(board)
+        return (white, black) if player == 2 else (black, white)
+
     def best_move(self, board, depth, player):
-        moves = [(x, y) for x in range(8) for y in range(8)
-                 if self.valid_move(board, x, y, player)]
+        """Best ``(x, y)`` for ``player`` searching ``depth`` plies, or None
+        without a legal move. Ties go to the lowest ``x``, then ``y``."""
+        own, opp = self.bitboards(board, player)
+        moves = squares(legal_moves(own, opp))
         if not moves:
             return None
 
+        self.table.clear()
+        moves.sort(key=lambda square: (square % 8, square // 8))
         best = None
-        if player == 2:
-            max_val = -float('inf')
-            for x, y in moves:
-                new_board = copy.deepcopy(board)
-                self.make_move(new_board, x, y, player)
-                val = self.alpha_beta(new_board, depth - 1, -float('inf'),
-                                      float('inf'), self.opponent(player))
-                if val > max_val:
-                    max_val = val
-                    best = (x, y)
-        else:
-            min_val = float('inf')
-            for x, y in moves:
-                new_board = copy.deepcopy(board)
-                self.make_move(new_board, x, y, player)
-                val = self.alpha_beta(new_board, depth - 1, -float('inf'),
-                                      float('inf'), self.opponent(player))
-                if val < min_val:
-                    min_val = val
-                    best = (x, y)
+        best_val = -float('inf') if player == 2 else float('inf')
+        for square in moves:
+            flipped = flips(own, opp, square)
+            # Children that cannot beat the best one so far only need a
+            # bound, so the window is narrowed to it.
+            if player == 2:
+                val = self.alpha_beta(opp ^ flipped,
+                                      own | flipped | 1 << square, depth - 1,
+                                      best_val, float('inf'),
+                                      self.opponent(player))
+                better = val > best_val
+            else:
+                val = self.alpha_beta(opp ^ flipped,
+                                      own | flipped | 1 << square, depth - 1,
+                                      -float('inf'), best_val,
+                                      self.opponent(player))
+                better = val < best_val
+            if better:
+                best_val = val
+                best = (square % 8, square // 8)
         return best
 
-    def alpha_beta(self, board, depth, alpha, beta, player):
+    def alpha_beta(self, own, opp, depth, alpha, beta, player):
+        """Minimax value of a position with ``player`` to move, within the
+        ``(alpha, beta)`` window."""
         if depth == 0:
-            w, b = self.score(board)
-            return w - b if player == 2 else b - w
+            return count(own) - count(opp)
 
-        moves = [(x, y) for x in range(8) for y in range(8)
-                 if self.valid_move(board, x, y, player)]
+        moves = legal_moves(own, opp)
         if not moves:
-            return self.alpha_beta(board, depth - 1, alpha, beta,
+            return self.alpha_beta(opp, own, depth - 1, alpha, beta,
                                    self.opponent(player))
 
-        if player == 2:
-            max_val = -float('inf')
-            for x, y in moves:
-                new_board = copy.deepcopy(board)
-                self.make_move(new_board, x, y, player)
-                val = self.alpha_beta(new_board, depth - 1, alpha, beta,
-                                      self.opponent(player))
-                max_val = max(max_val, val)
+        key = (own, opp, player, depth)
+        entry = self.table.get(key)
+        first = None
+        if entry is not None:
+            value, bound, first = entry
+            if bound == EXACT:
+                return value
+            if bound == LOWER:
+                alpha = max(alpha, value)
+            else:
+                beta = min(beta, value)
+            if beta <= alpha:
+                return value
+
+        ordered = sorted(squares(moves),
+                         key=lambda square:
+                         (square != first, -SQUARE_VALUES[square]))
+        alpha_orig, beta_orig = alpha, beta
+        maximizing = player == 2
+        best_val = -float('inf') if maximizing else float('inf')
+        best = None
+        for square in ordered:
+            flipped = flips(own, opp, square)
+            val = self.alpha_beta(opp ^ flipped, own | flipped | 1 << square,
+                                  depth - 1, alpha, beta,
+                                  self.opponent(player))
+            if maximizing:
+                if val > best_val:
+                    best_val, best = val, square
                 alpha = max(alpha, val)
-                if beta <= alpha:
-                    break
-            return max_val
-        else:
-            min_val = float('inf')
-            for x, y in moves:
-                new_board = copy.deepcopy(board)
-                self.make_move(new_board, x, y, player)
-                val = self.alpha_beta(new_board, depth - 1, alpha, beta,
-                                      self.opponent(player))
-                min_val = min(min_val, val)
+            else:
+                if val < best_val:
+                    best_val, best = val, square
                 beta = min(beta, val)
-                if beta <= alpha:
-                    break
-            return min_val
+            if beta <= alpha:
+                break
+
+        if best_val <= alpha_orig:
+            bound = UPPER
+        elif best_val >= beta_orig:
+            bound = LOWER
+        else:
+            bound = EXACT
+        self.table[key] = (best_val, bound, best)
+        return best_val
+
+    def perft(self, board, depth, player):
+        """Number of move sequences of ``depth`` plies from ``board``, a pass
+        counting as a ply and a finished game as a leaf. Used to check and
+        time move generation."""
+        return self._perft(*self.bitboards(board, player), depth)
+
+    def _perft(self, own, opp, depth):
+        if depth == 0:
+            return 1
+        moves = legal_moves(own, opp)
+        if not moves:
+            if not legal_moves(opp, own):
+                return 1
+            return self._perft(opp, own, depth - 1)
+        nodes = 0
+        for square in squares(moves):
+            flipped = flips(own, opp, square)
+            nodes += self._perft(opp ^ flipped, own | flipped | 1 << square,
+                                 depth - 1)
+        return nodes
@@ -1,4 +1,3 @@
-import copy
 import random
 import re
 
@@ -7,6 +6,7 @@ from PyQt5.QtWidgets import QMainWindow
 
 from playground.games import BaseGame, BaseGameLogic
 from playground.games.reversi.AI import ReversiAI
+from playground.games.reversi.reversi_raster import ReversiRasterRenderer
 from playground.games.reversi.reversi_ui import Ui_MainWindow
 from playground.registry import GAME_REGISTRY
 from playground.state_code import GameStatus
@@ -228,7 +228,8 @@ class Reversi(BaseGame):
 
     def get_screenshot(self):
         if self.renderer is None:
-            self.renderer = ReversiRenderer(self.logic)
+            self.renderer = self.create_renderer(ReversiRenderer,
+                                                 ReversiRasterRenderer)
         return self.renderer.get_screenshot()
 
     def input_move(self, move):
@@ -247,7 +248,8 @@ class Reversi(BaseGame):
         if not self.AI_component or self.logic.status != GameStatus.IN_PROGRESS:  # noqa
             return None
 
-        best_move = self.logic.ai.best_move(copy.deepcopy(self.logic.board), 3,
+        best_move = self.logic.ai.best_move(self.logic.board,
+                                            self.game_cfg.search_depth or 3,
                                             self.logic.current_player)
         if best_move:
             x, y = best_move
@@ -0,0 +1,55 @@
+from functools import lru_cache
+
+from playground.games.raster import (Backdrop, Canvas, button_sprite,
+                                     disc_sprite, font, text_sprite)
+
+WIDTH, HEIGHT = 500, 600
+CELL = 400 // 8
+LEFT, TOP = 60, 40
+GREEN = (0, 128, 0)
+BLACK = (0, 0, 0)
+WHITE = (255, 255, 255)
+DISC = CELL * 2 // 3 + 1
+DISC_COLORS = {1: BLACK, 2: WHITE}
+
+
+@lru_cache(maxsize=None)
+def background():
+    """Empty green board with its grid, labels and the restart button."""
+    canvas = Canvas(WIDTH, HEIGHT)
+    canvas.paste(button_sprite(100, 40), 200, 500)
+    canvas.paste_centered(text_sprite('Restart', 17, BLACK), 200, 500, 100, 40)
+
+    canvas.fill_rect(LEFT, TOP, 8 * CELL + 1, 8 * CELL + 1, BLACK)
+    for y in range(8):
+        for x in range(8):
+            canvas.fill_rect(LEFT + x * CELL + 1, TOP + y * CELL + 1, CELL - 1,
+                             CELL - 1, GREEN)
+
+    ascent = font(19, bold=True).getmetrics()[0]
+    for col in range(8):
+        canvas.paste(text_sprite(str(col + 1), 19, BLACK, bold=True),
+                     col * CELL + LEFT + CELL // 2 - 5, 35 - ascent)
+    for row in range(8):
+        canvas.paste(text_sprite(chr(ord('A') + row), 19, BLACK, bold=True),
+                     35, row * CELL + TOP + CELL // 2 + 5 - ascent)
+    return Backdrop(canvas)
+
+
+class ReversiRasterRenderer:
+    """Headless renderer drawing the same layout as the Qt window."""
+
+    def __init__(self, logic):
+        self.logic = logic
+
+    def get_screenshot(self):
+        backdrop = background()
+        canvas = backdrop.canvas()
+        for y, row in enumerate(self.logic.board):
+            for x, cell in enumerate(row):
+                if cell in DISC_COLORS:
+                    disc = disc_sprite(DISC, DISC_COLORS[cell], BLACK)
+                    backdrop.stamp(canvas, disc,
+                                   int(x * CELL + CELL / 6 + LEFT),
+                                   int(y * CELL + CELL / 6 + TOP))
+        return canvas.to_image()
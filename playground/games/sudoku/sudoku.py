@@ -8,6 +8,7 @@ from PyQt5.QtWidgets import QMainWindow
 
 from playground.games import BaseGame, BaseGameLogic
 from playground.games.sudoku import sudoku_generator
+from playground.games.sudoku.sudoku_raster import SudokuRasterRenderer
 from playground.games.sudoku.sudoku_ui import SudokuUI
 from playground.registry import GAME_REGISTRY
 from playground.state_code import GameStatus
@@ -28,6 +29,7 @@ class SudokuLogic(BaseGameLogic):
         self.moves_history = []
         self.timer_start = int(time.time())
         self.pause_time = 0
+        self.clues = sudoku_generator.difficulty_clues(game_cfg.difficulty)
         self.start_game()
 
     def start_game(self):
@@ -37,7 +39,11 @@ class SudokuLogic(BaseGameLogic):
                     for _ in range(self.b_size)]
         sudoku_generator.fillGrid(solution)
         self.solution = copy.deepcopy(solution)
-        self.puzzle = sudoku_generator.generate_puzzle(solution, 5)
+        if self.clues is None:
+            self.puzzle = sudoku_generator.generate_puzzle(solution, 5)
+        else:
+            self.puzzle = sudoku_generator.generate_puzzle(
+                solution, None, self.clues)
         self.assigned = [[self.puzzle[y][x] != 0 for x in range(self.b_size)]
                          for y in range(self.b_size)]
         self.moves_history = []
@@ -101,23 +107,13 @@ class SudokuLogic(BaseGameLogic):
         return copy.deepcopy(self.puzzle)
 
     def get_rule_state(self):
+        solver = sudoku_generator.Solver(self.puzzle)
         valid_movements = []
         for y in range(self.b_size):
             for x in range(self.b_size):
                 if self.puzzle[y][x] == 0:
-                    candidates = set(range(1, 10))
-                    for col in range(self.b_size):
-                        if self.puzzle[y][col] != 0:
-                            candidates.discard(self.puzzle[y][col])
-                    for row in range(self.b_size):
-                        if self.puzzle[row][x] != 0:
-                            candidates.discard(self.puzzle[row][x])
-                    start_row, start_col = (y // 3) * 3, (x // 3) * 3
-                    for row in range(start_row, start_row + 3):
-                        for col in range(start_col, start_col + 3):
-                            if self.puzzle[row][col] != 0:
-                                candidates.discard(self.puzzle[row][col])
-                    for num in sorted(candidates):
+                    candidates = solver.candidates(y, x)
+                    for num in sudoku_generator.digits(candidates):
                         valid_movements.append(
                             f"{chr(y + ord('A'))}{x + 1} {num}")
         return self.puzzle, valid_movements
@@ -149,6 +145,15 @@ class SudokuLogic(BaseGameLogic):
         return GameStatus.INVALID_MOVE
 
 
+STYLE_GIVEN = (
+    'color: black; background-color: white; font-family: sans-serif; '
+    'font-size: 25px; border: 1px solid black;')
+STYLE_FILLED = (
+    'color: blue; background-color: white; font-family: sans-serif; '
+    'font-size: 25px; border: 1px solid black;')
+STYLE_EMPTY = STYLE_GIVEN
+
+
 class SudokuRenderer(QMainWindow):
     """Renderer for Sudoku UI."""
 
@@ -157,6 +162,8 @@ class SudokuRenderer(QMainWindow):
         self.logic = logic
         self.ui = SudokuUI(self)
         self.setCentralWidget(self.ui.centralwidget)
+        self.rendered = [[None] * self.logic.b_size
+                         for _ in range(self.logic.b_size)]
         self._update_ui_from_logic()
         self.adjust_window_size()
         self.timer = QTimer(self)
@@ -168,26 +175,22 @@ class SudokuRenderer(QMainWindow):
         self.setFixedSize(550, 700)
 
     def _update_ui_from_logic(self):
-        """Sync UI with logic state."""
+        """Sync UI with logic state, restyling only the changed cells."""
         for y in range(self.logic.b_size):
             for x in range(self.logic.b_size):
+                value = self.logic.puzzle[y][x]
+                given = value != 0 and self.logic.assigned[y][x]
+                if (value, given) == self.rendered[y][x]:
+                    continue
+                self.rendered[y][x] = (value, given)
                 btn = self.ui.puzzle_buttons[y][x]
-                if self.logic.puzzle[y][x] != 0:
-                    btn.setText(str(self.logic.puzzle[y][x]))
-                    if self.logic.assigned[y][x]:
-                        btn.setStyleSheet(
-                            'color: black; background-color: white; font-family: sans-serif; font-size: 25px; border: 1px solid black;'  # noqa
-                        )
-                    else:
-                        btn.setStyleSheet(
-                            'color: blue; background-color: white; font-family: sans-serif; font-size: 25px; border: 1px solid black;'  # noqa
-                        )
+                if value != 0:
+                    btn.setText(str(value))
+                    btn.setStyleSheet(STYLE_GIVEN if given else STYLE_FILLED)
                     btn.setDisabled(True)
                 else:
                     btn.setText('')
-                    btn.setStyleSheet(
-                        'color: black; background-color: white; font-family: sans-serif; font-size: 25px; border: 1px solid black;'  # noqa
-                    )
+                    btn.setStyleSheet(STYLE_EMPTY)
                     btn.setEnabled(True)
 
     def update_time(self):
@@ -221,7 +224,8 @@ class Sudoku(BaseGame):
 
     def get_screenshot(self):
         if self.renderer is None:
-            self.renderer = SudokuRenderer(self.logic)
+            self.renderer = self.create_renderer(SudokuRenderer,
+                                                 SudokuRasterRenderer)
         return self.renderer.get_screenshot()
 
     def input_move(self, move):
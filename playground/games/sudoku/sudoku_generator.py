@@ -1,85 +1,163 @@
-from random import randint, shuffle
+"""Sudoku generation on bitmasks.
+
+Digit ``d`` is bit ``1 << d``. ``Solver`` keeps the digits used by every
+row, column and box as one int each, so the candidates of a cell are a
+single mask and the search always branches on the cell with the fewest.
+"""
+from random import shuffle
+
+ALL_DIGITS = 0b1111111110
+# Number of clues left by each named difficulty.
+DIFFICULTY_CLUES = {'easy': 36, 'medium': 30, 'hard': 26, 'expert': 23}
+
+
+def difficulty_clues(difficulty):
+    """Clues to leave for a ``difficulty`` name of ``DIFFICULTY_CLUES`` or a
+    clue count from 17 to 81. None stays None."""
+    if difficulty is None:
+        return None
+    if isinstance(difficulty, str) and difficulty in DIFFICULTY_CLUES:
+        return DIFFICULTY_CLUES[difficulty]
+    if isinstance(difficulty, int) and 17 <= difficulty <= 81:
+        return difficulty
+    raise ValueError(f'Invalid Sudoku difficulty: {difficulty!r}. Use one of '
+                     f"{', '.join(DIFFICULTY_CLUES)} or a number of clues "
+                     'from 17 to 81.')
+
+
+def box(row, col):
+    return row // 3 * 3 + col // 3
+
+
+def digits(mask):
+    """Digits of ``mask``, lowest first."""
+    return [d for d in range(1, 10) if mask >> d & 1]
 
 
 def checkGrid(grid):
-    for row in range(9):
-        for col in range(9):
-            if grid[row][col] == 0:
-                return False
-    return True
+    return all(value != 0 for row in grid for value in row)
+
+
+class Solver:
+    """Backtracking search over a 9x9 ``grid`` (a list of rows, 0 for
+    empty), filled in place.
+
+    Each step fills the empty cell with the fewest candidates, so forced
+    cells are placed without branching and dead ends show up as a cell with
+    none.
+    """
+
+    def __init__(self, grid):
+        self.grid = grid
+        self.rows = [0] * 9
+        self.cols = [0] * 9
+        self.boxes = [0] * 9
+        self.empty = []
+        for row in range(9):
+            for col in range(9):
+                value = grid[row][col]
+                if value == 0:
+                    self.empty.append((row, col))
+                else:
+                    self.place(row, col, 1 << value)
+
+    def place(self, row, col, bit):
+        self.rows[row] |= bit
+        self.cols[col] |= bit
+        self.boxes[box(row, col)] |= bit
+
+    def remove(self, row, col, bit):
+        self.rows[row] ^= bit
+        self.cols[col] ^= bit
+        self.boxes[box(row, col)] ^= bit
+
+    def candidates(self, row, col):
+        """Mask of the digits that can go in ``(row, col)``."""
+        return ALL_DIGITS & ~(self.rows[row] | self.cols[col]
+                              | self.boxes[box(row, col)])
+
+    def solve(self, limit=1, randomize=False):
+        """Count solutions, stopping at ``limit``. If it is reached the grid
+        holds the last solution found, otherwise it is left unchanged. With
+        ``randomize`` digits are tried in random order."""
+        return self._search(limit, randomize)
+
+    def _search(self, limit, randomize):
+        empty = self.empty
+        if not empty:
+            return 1
+        best, best_mask, best_count = 0, 0, 10
+        for i, (row, col) in enumerate(empty):
+            mask = self.candidates(row, col)
+            count = bin(mask).count('1')
+            if count < best_count:
+                best, best_mask, best_count = i, mask, count
+                if count <= 1:
+                    break
+        if best_count == 0:
+            return 0
+
+        row, col = empty[best]
+        empty[best] = empty[-1]
+        empty.pop()
+        values = digits(best_mask)
+        if randomize:
+            shuffle(values)
+        found = 0
+        for value in values:
+            bit = 1 << value
+            self.grid[row][col] = value
+            self.place(row, col, bit)
+            found += self._search(limit - found, randomize)
+            self.remove(row, col, bit)
+            if found >= limit:
+                break
+        empty.append((row, col))
+        empty[best], empty[-1] = empty[-1], empty[best]
+        if found < limit:
+            self.grid[row][col] = 0
+        return found
 
 
 def fillGrid(grid):
-    numberList = [1, 2, 3, 4, 5, 6, 7, 8, 9]
-
-    for i in range(81):
-        row = i // 9
-        col = i % 9
-        if grid[row][col] == 0:
-            shuffle(numberList)
-
-            for value in numberList:
-                if not (value in grid[row]):
-                    if value not in [grid[r][col] for r in range(9)]:
-                        square = [
-                            grid[r][c]
-                            for r in range(row // 3 * 3, row // 3 * 3 + 3)
-                            for c in range(col // 3 * 3, col // 3 * 3 + 3)
-                        ]
-                        if value not in square:
-                            grid[row][col] = value
-                            if checkGrid(grid):
-                                return True
-                            elif fillGrid(grid):
-                                return True
-            break
-    grid[row][col] = 0
-    return False
-
-
-def solveGrid(grid, counter):
-    for i in range(81):
-        row = i // 9
-        col = i % 9
-        if grid[row][col] == 0:
-            for value in range(1, 10):
-                if not (value in grid[row]):
-                    if value not in [grid[r][col] for r in range(9)]:
-                        square = [
-                            grid[r][c]
-                            for r in range(row // 3 * 3, row // 3 * 3 + 3)
-                            for c in range(col // 3 * 3, col // 3 * 3 + 3)
-                        ]
-                        if value not in square:
-                            grid[row][col] = value
-                            if checkGrid(grid):
-                                counter[0] += 1
-                                break
-                            elif solveGrid(grid, counter):
-                                return True
-            break
-    grid[row][col] = 0
-    return False
+    """Fill the empty cells of ``grid`` with a random solution. Returns
+    whether there is one."""
+    return Solver(grid).solve(randomize=True) == 1
 
 
-def generate_puzzle(grid, attempts):
-    counter = [0]
+def solveGrid(grid):
+    """Fill the empty cells of ``grid`` with its first solution. Returns
+    whether there is one."""
+    return Solver(grid).solve() == 1
 
-    while attempts > 0:
-        row, col = randint(0, 8), randint(0, 8)
-        while grid[row][col] == 0:
-            row, col = randint(0, 8), randint(0, 8)
 
-        backup = grid[row][col]
-        grid[row][col] = 0
+def countSolutions(grid, limit=2):
+    """Number of solutions of ``grid``, counted up to ``limit``. The grid
+    is not modified."""
+    return Solver([row[:] for row in grid]).solve(limit)
 
-        copyGrid = [[grid[r][c] for c in range(9)] for r in range(9)]
-        counter[0] = 0
 
-        solveGrid(copyGrid, counter)
+def generate_puzzle(grid, attempts, clues=0):
+    """Remove digits from the solved ``grid``, in place, as long as the
+    puzzle keeps a unique solution.
 
-        if counter[0] != 1:
+    Cells are tried in random order. Removal stops once ``clues`` digits are
+    left, after ``attempts`` failed removals (None for no limit), or when
+    every cell has been tried.
+    """
+    cells = [(row, col) for row in range(9) for col in range(9)
+             if grid[row][col] != 0]
+    shuffle(cells)
+    left = len(cells)
+    for row, col in cells:
+        if left <= clues or attempts == 0:
+            break
+        backup = grid[row][col]
+        grid[row][col] = 0
+        if countSolutions(grid) == 1:
+            left -= 1
+        else:
             grid[row][col] = backup
-            attempts -= 1
-
+            if attempts is not None:
+                attempts -= 1
     return grid
@@ -0,0 +1,79 @@
+import string
+from functools import lru_cache
+
+from playground.games.raster import Backdrop, Canvas, text_sprite
+
+WIDTH, HEIGHT = 550, 700
+# Margin of the page widget inside the window layout.
+MARGIN = 9
+CELL = 45
+BLACK = (0, 0, 0)
+BLUE = (0, 0, 255)
+WHITE = (255, 255, 255)
+
+
+def cell_origin(row, col):
+    """Top-left corner of a cell, leaving room for the thick box lines."""
+    return (MARGIN + 51 + col * CELL + 2 * (col // 3 + 1) + col,
+            MARGIN + 101 + row * CELL + 2 * (row // 3 + 1) + row)
+
+
+def grid_lines():
+    """Geometry of the thick and thin grid lines of the page."""
+    lines = [(50, 100, 424, 3), (50, 100, 3, 424), (470, 100, 3, 424),
+             (50, 520, 424, 3), (190, 100, 3, 422), (330, 100, 3, 422),
+             (50, 240, 422, 3), (50, 380, 422, 3)]
+    for start, vertical in ((98, True), (148, False)):
+        gap = start
+        for i in range(6):
+            if i > 0 and i % 2 == 0:
+                gap += 48
+            if vertical:
+                lines.append((gap, 100, 1, 422))
+            else:
+                lines.append((50, gap, 422, 1))
+            gap += 46
+    return lines
+
+
+@lru_cache(maxsize=None)
+def background():
+    """Page with the grid, the empty cells and the row/column labels."""
+    canvas = Canvas(WIDTH, HEIGHT, WHITE)
+    for x, y, width, height in grid_lines():
+        canvas.fill_rect(MARGIN + x, MARGIN + y, width, height, BLACK)
+    for row in range(9):
+        for col in range(9):
+            x, y = cell_origin(row, col)
+            canvas.fill_rect(x, y, CELL, CELL, WHITE)
+            canvas.outline_rect(x, y, CELL, CELL, BLACK)
+    for i in range(9):
+        row_label = text_sprite(string.ascii_uppercase[i], 20, BLACK)
+        canvas.paste_centered(row_label, MARGIN + 30,
+                              MARGIN + 101 + i * CELL + (CELL - 25) // 2, 20,
+                              25)
+        col_label = text_sprite(str(i + 1), 20, BLACK)
+        canvas.paste_centered(col_label,
+                              MARGIN + 51 + i * CELL + (CELL - 25) // 2,
+                              MARGIN + 75, 25, 20)
+    return Backdrop(canvas)
+
+
+class SudokuRasterRenderer:
+    """Headless renderer drawing the same layout as the Qt window."""
+
+    def __init__(self, logic):
+        self.logic = logic
+
+    def get_screenshot(self):
+        backdrop = background()
+        canvas = backdrop.canvas()
+        for y in range(self.logic.b_size):
+            for x in range(self.logic.b_size):
+                value = self.logic.puzzle[y][x]
+                if value != 0:
+                    color = BLACK if self.logic.assigned[y][x] else BLUE
+                    digit = text_sprite(str(value), 25, color)
+                    backdrop.stamp_centered(canvas, digit, *cell_origin(y, x),
+                                            CELL, CELL)
+        return canvas.to_image()
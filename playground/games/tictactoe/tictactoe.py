@@ -7,6 +7,7 @@ from PyQt5.QtWidgets import QMainWindow
 
 from playground.games import BaseGame, BaseGameLogic
 from playground.games.tictactoe.AI import Minimax
+from playground.games.tictactoe.tictactoe_raster import TicTacToeRasterRenderer
 from playground.games.tictactoe.tictactoe_ui import Ui_MainWindow
 from playground.registry import GAME_REGISTRY
 from playground.state_code import GameStatus
@@ -181,6 +182,7 @@ class TicTacToeRenderer(QMainWindow):
                 button.setStyleSheet('')
 
     def get_screenshot(self):
+        self._update_ui()
         board_width = 500
         board_height = 600
         screenshot = QPixmap(board_width, board_height)
@@ -206,8 +208,8 @@ class TicTacToe(BaseGame):
 
     def get_screenshot(self):
         if self.renderer is None:
-            self.renderer = TicTacToeRenderer(self.logic)
-        self.renderer._update_ui()
+            self.renderer = self.create_renderer(TicTacToeRenderer,
+                                                 TicTacToeRasterRenderer)
         return self.renderer.get_screenshot()
 
     def input_move(self, move):
@@ -0,0 +1,51 @@
+from functools import lru_cache
+
+from playground.games.raster import (Backdrop, Canvas, button_sprite,
+                                     text_sprite)
+
+WIDTH, HEIGHT = 500, 600
+CELL = 140
+MARK_COLORS = {'X': (255, 0, 0), 'O': (0, 0, 255)}
+
+
+def cell_origin(index):
+    row, col = divmod(index, 3)
+    return 50 + col * CELL, 100 + row * CELL
+
+
+@lru_cache(maxsize=None)
+def background():
+    """Window with the empty buttons and the row/column labels."""
+    canvas = Canvas(WIDTH, HEIGHT)
+    for i in range(9):
+        canvas.paste(button_sprite(CELL, CELL), *cell_origin(i))
+    for i, row in enumerate('ABC'):
+        canvas.paste_centered(text_sprite(row, 22, (0, 0, 0), bold=True), 30,
+                              170 + i * CELL, 20, 20)
+    for i, column in enumerate('123'):
+        canvas.paste_centered(text_sprite(column, 22, (0, 0, 0), bold=True),
+                              105 + i * CELL, 70, 20, 20)
+    return Backdrop(canvas)
+
+
+class TicTacToeRasterRenderer:
+    """Headless renderer drawing the same layout as the Qt window."""
+
+    def __init__(self, logic):
+        self.logic = logic
+
+    def get_screenshot(self):
+        backdrop = background()
+        canvas = backdrop.canvas()
+        prefix = text_sprite('You are playing as ', 28, (0, 0, 0))
+        player = text_sprite(str(self.logic.opponent), 28,
+                             MARK_COLORS.get(self.logic.opponent, (0, 0, 0)))
+        y = 30 + (51 - prefix.height) // 2
+        backdrop.stamp(canvas, prefix, 50, y)
+        backdrop.stamp(canvas, player, 50 + prefix.width, y)
+        for i, cell in enumerate(self.logic.board):
+            if cell in MARK_COLORS:
+                mark = text_sprite(cell, 49, MARK_COLORS[cell])
+                backdrop.stamp_centered(canvas, mark, *cell_origin(i), CELL,
+                                        CELL)
+        return canvas.to_image()
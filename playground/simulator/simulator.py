@@ -1,11 +1,13 @@
 import os
 import os.path as osp
+from concurrent.futures import ThreadPoolExecutor
 
 import imageio
 import torch
 
 from playground.registry import GAME_REGISTRY
 from playground.state_code import GameStatus
+from playground.utils import to_pil_image
 
 
 class GameSimulator:
@@ -30,6 +32,10 @@ class GameSimulator:
         self.display = game_cfg.display
         self.game_cfg = game_cfg
         self.log_file = log_file
+        self.save_screenshots = game_cfg.save_screenshots is not False
+        self.screenshot_path = None
+        self.saver = None
+        self.pending_saves = []
 
     def log(self, message):
         """Log a message to the game log."""
@@ -40,6 +46,7 @@ class GameSimulator:
 
     def make_video(self):
         """Make a video from the game screenshots."""
+        self.flush_screenshots()
         images = []
         for file_name in sorted(os.listdir(self.current_game_dir)):
             if file_name.endswith('.jpg') and file_name.startswith('step_'):
@@ -59,20 +66,40 @@ class GameSimulator:
         print(f'Video saved as {video_path}')
 
     def get_screenshot(self):
-        """Get the current game state screenshot."""
+        """Get the current game state screenshot as an in-memory PIL image.
+        The path it is saved to, if any, is kept in ``screenshot_path``."""
         if not self.game_instance:
             raise ValueError(
                 'No game instance. Call new_game() to start a new game.')
 
         screenshot = self.game_instance.get_screenshot()
-        if screenshot:
-            filename = f'step_{self.step_counter:07d}.jpg'
-            filepath = os.path.join(self.current_game_dir, filename)
-            screenshot.save(filepath)
-            print(f'Screenshot saved as {filepath}')
-            self.step_counter += 1
-            return filepath
-        return None
+        if screenshot is None:
+            self.screenshot_path = None
+            return None
+        screenshot = to_pil_image(screenshot)
+        self.screenshot_path = self.save_screenshot(screenshot)
+        self.step_counter += 1
+        return screenshot
+
+    def save_screenshot(self, screenshot):
+        """Write a screenshot to the game directory in the background, so the
+        JPEG encoding overlaps with the agent. Returns the file path, or None
+        when ``save_screenshots`` is disabled."""
+        if not self.save_screenshots:
+            return None
+        if self.saver is None:
+            self.saver = ThreadPoolExecutor(max_workers=1)
+        filename = f'step_{self.step_counter:07d}.jpg'
+        filepath = os.path.join(self.current_game_dir, filename)
+        self.pending_saves.append(self.saver.submit(screenshot.save, filepath))
+        print(f'Saving screenshot as {filepath}')
+        return filepath
+
+    def flush_screenshots(self):
+        """Wait until all screenshots are written, re-raising any error."""
+        pending, self.pending_saves = self.pending_saves, []
+        for future in pending:
+            future.result()
 
     def input_move(self, move):
         """Input a move into the game."""
@@ -92,82 +119,61 @@ class GameSimulator:
                 'No game instance. Call new_game() to start a new game.')
         return self.game_instance.get_game_status()
 
-    def perceive(self, batch):
-        """Run the game simulation in perception mode."""
-        if not self.agent:
-            raise ValueError('No agent set. Call set_agent() to set an agent.')
-
-        if self.game_instance is None:
-            self.new_game()
-
-        prompt = self.game_cfg.game_description[self.task]
-        screenshot_path = batch['screenshot_path']
-        gt = batch['gt']
-
-        if screenshot_path:
-            try:
-                lmm_output = self.agent.get_decision(screenshot_path, prompt)
-            except Exception as e:
-                lmm_output = None
-                self.log(f'Failed to get decision from LMM: {e}')
-
-            self.log(f'LMM Output: {lmm_output}')
-            self.log(f'Ground truth: {gt}')
-            return dict(raw=lmm_output)
-        else:
-            raise ValueError('Failed to get screenshot.')
+    def get_prompt(self, batch):
+        """Build the prompt of an offline (perceive, rule or qa) sample."""
+        if self.task == 'qa':
+            question = f"Question: {batch['gt']['question']}"
+            QA = batch['game_cfg'].qa(batch['game_cfg'].game_description['qa'])
+            return QA.general_prompt.format(question=question)
+        return self.game_cfg.game_description[self.task]
 
-    def rule(self, batch):
-        """Run the game simulation in rule mode"""
+    def run_offline(self, batch):
+        """Query the agent on a single offline sample."""
         if not self.agent:
             raise ValueError('No agent set. Call set_agent() to set an agent.')
 
         if self.game_instance is None:
             self.new_game()
 
-        rule_state = batch['gt']['rule_state']
         screenshot_path = batch['screenshot_path']
-        valid_movements = batch['gt']['valid_movements']
+        if not screenshot_path:
+            raise ValueError('Failed to get screenshot.')
 
-        prompt = self.game_cfg.game_description[self.task]
+        prompt = self.get_prompt(batch)
         try:
             lmm_output = self.agent.get_decision(screenshot_path, prompt)
         except Exception as e:
-            lmm_output = None
             self.log(f'Failed to get decision from LMM: {e}')
-
-        self.log(f'Game state: {rule_state}')
-        self.log(f'LMM Output: {lmm_output}')
-        self.log(f'Valid movements: {valid_movements}')
+            raise
+        return self.offline_result(batch, prompt, lmm_output)
+
+    def offline_result(self, batch, prompt, lmm_output):
+        """Log the agent output of an offline sample and wrap it as the
+        round result."""
+        if self.task == 'rule':
+            self.log(f"Game state: {batch['gt']['rule_state']}")
+            self.log(f'LMM Output: {lmm_output}')
+            self.log(f"Valid movements: {batch['gt']['valid_movements']}")
+        elif self.task == 'qa':
+            self.log(f'Prompt:\n {prompt}')
+            self.log(f'LMM Output: {lmm_output}')
+            self.log(f"Ground truth: {batch['gt']['answer']}")
+        else:
+            self.log(f'LMM Output: {lmm_output}')
+            self.log(f"Ground truth: {batch['gt']}")
         return dict(raw=lmm_output)
 
-    def qa(self, batch):
-        """Run the game simulation in QA mode"""
-        if not self.agent:
-            raise ValueError('No agent set. Call set_agent() to set an agent.')
-
-        if self.game_instance is None:
-            self.new_game()
-
-        question, gt = batch['gt']['question'], batch['gt']['answer']
-        question = f'Question: {question}'
-        QA = batch['game_cfg'].qa(batch['game_cfg'].game_description['qa'])
-        prompt = QA.general_prompt.format(question=question)
-        screenshot_path = batch['screenshot_path']
+    def perceive(self, batch):
+        """Run the game simulation in perception mode."""
+        return self.run_offline(batch)
 
-        if screenshot_path:
-            try:
-                lmm_output = self.agent.get_decision(screenshot_path, prompt)
-            except Exception as e:
-                lmm_output = None
-                self.log(f'Failed to get decision from LMM: {e}')
+    def rule(self, batch):
+        """Run the game simulation in rule mode"""
+        return self.run_offline(batch)
 
-            self.log(f'Prompt:\n {prompt}')
-            self.log(f'LMM Output: {lmm_output}')
-            self.log(f'Ground truth: {gt}')
-            return dict(raw=lmm_output)
-        else:
-            raise ValueError('Failed to get screenshot.')
+    def qa(self, batch):
+        """Run the game simulation in QA mode"""
+        return self.run_offline(batch)
 
     def new_game(self, step_counter=0):
         """Initialize a new game instance."""
@@ -188,19 +194,20 @@ class GameSimulator:
         if not self.agent:
             raise ValueError('No agent set. Call set_agent() to set an agent.')
 
-        self.new_game()
+        if self.game_instance is None:
+            self.new_game()
         prompt = self.game_cfg.game_description[self.task]
         invalid_attempts = 0
-        last_screenshot_path = None
+        last_screenshot = None
         history = []
 
         while self.get_game_status() == GameStatus.IN_PROGRESS:
             self.log(f'Step {self.step_counter}')
-            if last_screenshot_path is None:
-                last_screenshot_path = self.get_screenshot()
-            screenshot_path = last_screenshot_path
+            if last_screenshot is None:
+                last_screenshot = self.get_screenshot()
+            screenshot_path = self.screenshot_path
 
-            lmm_output = self.agent.get_decision(screenshot_path, prompt)
+            lmm_output = self.agent.get_decision(last_screenshot, prompt)
             move = self.game_instance.parse_e2e(lmm_output)
             self.log(f'LMM Output: {lmm_output}')
             self.log(f'Parsed movement: {move}')
@@ -235,6 +242,7 @@ class GameSimulator:
                     score = self.game_instance.calculate_score()
                     self.log(f'Game ended with score: {score}')
                     history.append(step_record)
+                    self.flush_screenshots()
                     return {
                         'score': score,
                         'steps': self.step_counter,
@@ -243,15 +251,15 @@ class GameSimulator:
                 history.append(step_record)
                 continue
 
-            last_screenshot_path = self.get_screenshot()
-            step_record['screenshot_path'] = last_screenshot_path
+            last_screenshot = self.get_screenshot()
+            step_record['screenshot_path'] = self.screenshot_path
 
             if self.game_instance.AI_component:
                 ai_move = self.game_instance.ai_move()
                 if ai_move:
                     self.log(f'AI move: {ai_move}')
                     step_record['ai_move'] = ai_move
-                    last_screenshot_path = self.get_screenshot()
+                    last_screenshot = self.get_screenshot()
 
             history.append(step_record)
 
@@ -259,9 +267,10 @@ class GameSimulator:
             if final_status != GameStatus.IN_PROGRESS:
                 break
 
-        if last_screenshot_path is None or self.get_game_status(
+        if last_screenshot is None or self.get_game_status(
         ) != GameStatus.IN_PROGRESS:
-            last_screenshot_path = self.get_screenshot()
+            last_screenshot = self.get_screenshot()
+        self.flush_screenshots()
 
         score = self.game_instance.calculate_score()
         self.log(f'Game ended with status: {final_status}, Score: {score}')
@@ -269,6 +278,10 @@ class GameSimulator:
         return {'score': score, 'steps': self.step_counter, 'history': history}
 
     def cleanup(self):
+        if self.saver is not None:
+            self.flush_screenshots()
+            self.saver.shutdown()
+            self.saver = None
         if self.game_instance:
             del self.game_instance
         del self.agent
@@ -1,3 +1,10 @@
-from .utils import encode_image, set_random_seed
+from .journal import RecordJournal, load_record, set_result
+from .utils import (PreparedImage, configure_image_cache, derive_seed,
+                    encode_image, image_payload, load_image, prepare_image,
+                    set_random_seed, to_pil_image)
 
-__all__ = ['set_random_seed', 'encode_image']
+__all__ = [
+    'set_random_seed', 'derive_seed', 'encode_image', 'image_payload',
+    'load_image', 'to_pil_image', 'PreparedImage', 'prepare_image',
+    'configure_image_cache', 'RecordJournal', 'load_record', 'set_result'
+]
@@ -0,0 +1,90 @@
+import fcntl
+import json
+import os
+import os.path as osp
+import threading
+
+
+def journal_path(record_path):
+    """Journal kept next to a consolidated ``<name>.json`` record."""
+    return osp.splitext(record_path)[0] + '.journal.jsonl'
+
+
+def set_result(record, task, game, index, result):
+    rounds = record.setdefault(task, {}).setdefault(game, [])
+    if index >= len(rounds):
+        rounds.extend([None] * (index + 1 - len(rounds)))
+    rounds[index] = result
+
+
+def load_record(record_path):
+    """Load an experiment record: the consolidated JSON file (if any) with
+    the rounds of its journal replayed on top. A torn last line, left by an
+    interrupted write, is ignored."""
+    record = {}
+    if osp.exists(record_path):
+        with open(record_path, 'r') as f:
+            record = json.load(f)
+    path = journal_path(record_path)
+    if osp.exists(path):
+        with open(path, 'r') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                set_result(record, entry['task'], entry['game'],
+                           entry['index'], entry['result'])
+    return record
+
+
+class RecordJournal:
+    """Write-ahead log of an experiment record.
+
+    Every completed round is appended as one JSON line and fsync'd, so saving
+    a round costs O(1) instead of rewriting the whole record. ``compact``
+    folds the journal into the consolidated record file.
+    """
+
+    def __init__(self, record_path, encoder=None):
+        self.record_path = record_path
+        self.path = journal_path(record_path)
+        self.encoder = encoder
+        self.lock = threading.Lock()
+        self.file = open(self.path, 'a', encoding='utf-8')
+
+    def append(self, task, game, index, result):
+        line = json.dumps(
+            {
+                'task': task,
+                'game': game,
+                'index': index,
+                'result': result
+            },
+            cls=self.encoder)
+        with self.lock:
+            self.file.write(line + '\n')
+            self.file.flush()
+            os.fsync(self.file.fileno())
+
+    def compact(self, record):
+        """Write ``record`` as the consolidated file, atomically, and empty
+        the journal whose rounds it now contains. Processes sharing the
+        record compact one at a time, under an exclusive POSIX lock of a
+        sidecar lock file. Unlike ``flock``, it is held across machines on
+        NFS, when its lock manager runs."""
+        tmp_path = self.record_path + '.tmp'
+        with self.lock, open(self.record_path + '.lock', 'a') as lock:
+            fcntl.lockf(lock, fcntl.LOCK_EX)
+            try:
+                with open(tmp_path, 'w') as f:
+                    json.dump(record, f, indent=4, cls=self.encoder)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(tmp_path, self.record_path)
+                self.file.truncate(0)
+            finally:
+                fcntl.lockf(lock, fcntl.LOCK_UN)
+
+    def close(self):
+        self.file.close()